@@ -11,11 +11,11 @@ Usage:
 
 import argparse
 import logging
-import json
+import os
 from pathlib import Path
-from dataclasses import asdict
 
-from page_aligner import align_chapters, print_alignment, AlignmentResult
+from page_aligner import align_chapters, print_alignment, AlignmentResult, to_json_bytes
+from util import chapter_sort_key
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,37 +24,41 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def write_json(path: Path, data: dict):
+    """Write data as indented UTF-8 JSON (orjson if available).
+
+    The payload is encoded to bytes once and written in a single call.
+    """
+    path.write_bytes(to_json_bytes(data))
+
+
 def find_chapter_pairs(chapters_dir: Path) -> list[tuple[Path, Path, str]]:
     """Find matching EN/ES chapter pairs.
 
     Returns list of (en_zip, es_zip, chapter_number) tuples.
     """
-    pairs = []
-
-    # Find all ZIP files
-    zips = list(chapters_dir.glob("*.zip"))
-
-    # Group by chapter number
+    # Group ZIP files by chapter number in a single directory pass
     by_chapter = {}
-    for zip_path in zips:
-        # Parse filename: 001_en.zip, 001_es.zip, 200.8_en.zip
-        stem = zip_path.stem  # "001_en"
-        parts = stem.rsplit("_", 1)
-        if len(parts) != 2:
-            continue
-
-        ch_num, lang = parts
-        if ch_num not in by_chapter:
-            by_chapter[ch_num] = {}
-        by_chapter[ch_num][lang] = zip_path
-
-    # Find pairs with both EN and ES
-    for ch_num in sorted(by_chapter.keys(), key=lambda x: float(x) if x.replace('.', '').isdigit() else 0):
-        langs = by_chapter[ch_num]
-        if "en" in langs and "es" in langs:
-            pairs.append((langs["en"], langs["es"], ch_num))
-
-    return pairs
+    with os.scandir(chapters_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(".zip") or not entry.is_file(follow_symlinks=False):
+                continue
+
+            # Parse filename: 001_en.zip, 001_es.zip, 200.8_en.zip
+            parts = entry.name[:-4].rsplit("_", 1)
+            if len(parts) != 2:
+                continue
+
+            ch_num, lang = parts
+            by_chapter.setdefault(ch_num, {})[lang] = Path(entry.path)
+
+    # Find pairs with both EN and ES, ordered by precomputed numeric key
+    keyed = sorted(
+        (chapter_sort_key(ch_num), ch_num, langs)
+        for ch_num, langs in by_chapter.items()
+        if "en" in langs and "es" in langs
+    )
+    return [(langs["en"], langs["es"], ch_num) for _, ch_num, langs in keyed]
 
 
 def align_all_chapters(
@@ -124,19 +128,11 @@ def align_all_chapters(
                     "insert_a_count": result.insert_a_count,
                     "insert_b_count": result.insert_b_count,
                     "avg_distance": result.avg_distance,
-                    "matches": [
-                        {
-                            "page_a": asdict(m.page_a) if m.page_a else None,
-                            "page_b": asdict(m.page_b) if m.page_b else None,
-                            "distance": m.distance,
-                            "match_type": m.match_type
-                        }
-                        for m in result.matches
-                    ]
+                    # PageMatch dataclasses serialize directly, no dict pre-pass
+                    "matches": result.matches
                 }
 
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                write_json(output_path, data)
 
         except Exception as e:
             logger.error(f"  Error: {e}")
@@ -148,8 +144,7 @@ def align_all_chapters(
     # Save summary
     if output_dir:
         summary_path = output_dir / "summary.json"
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False)
+        write_json(summary_path, summary)
         logger.info(f"\nSaved summary to {summary_path}")
 
     return summary
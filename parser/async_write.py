@@ -0,0 +1,38 @@
+"""Streamed async file writes with few thread-pool round-trips."""
+
+import asyncio
+from pathlib import Path
+from typing import AsyncIterable
+
+# Coalesce network chunks into writes of up to this many bytes
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def _write_block(path: Path, data: bytes, mode: str):
+    """Open, write and close in one go (runs on a worker thread)."""
+    with open(path, mode) as f:
+        f.write(data)
+
+
+async def write_all(
+    path: Path,
+    chunks: AsyncIterable[bytes],
+    buffer_size: int = WRITE_BUFFER_SIZE
+):
+    """Write an async stream of chunks to path.
+
+    Chunks are buffered and each block is written with a single executor
+    call (open + write + close), so a typical page costs one thread hop
+    instead of aiofiles' open/write.../close hops. Memory stays <= buffer_size.
+    """
+    loop = asyncio.get_running_loop()
+    buf = bytearray()
+    mode = "wb"
+    async for chunk in chunks:
+        buf += chunk
+        if len(buf) >= buffer_size:
+            await loop.run_in_executor(None, _write_block, path, bytes(buf), mode)
+            buf.clear()
+            mode = "ab"
+    if buf or mode == "wb":
+        await loop.run_in_executor(None, _write_block, path, bytes(buf), mode)
@@ -9,6 +9,8 @@ Where XXXX = chapter number (zero-padded), YYY = page number (zero-padded)
 import asyncio
 import re
 import logging
+import ssl
+from functools import lru_cache
 from dataclasses import dataclass
 from typing import Optional
 
@@ -20,6 +22,12 @@ logger = logging.getLogger(__name__)
 
 BASE_URL = "https://callofthenight.space"
 IMAGE_BASE = "https://official.lowee.us/manga/Yofukashi-no-Uta"
+MAX_PAGES = 100  # Safety limit for page probing
+
+# Image URLs embedded in chapter HTML: official.lowee.us/manga/Yofukashi-no-Uta/XXXX-YYY.png
+_IMG_RE = re.compile(re.escape(IMAGE_BASE) + r'/[^"]+\.png')
+# Chapter links: /chapters/XXX/
+_CH_RE = re.compile(r'/chapters/([0-9]+(?:-[0-9]+)?(?:\.[0-9]+)?)')
 
 
 @dataclass
@@ -31,8 +39,31 @@ class COTNChapter:
     image_urls: list[str]
 
 
+def create_session(
+    ssl_context: Optional[ssl.SSLContext] = None,
+    max_connections: int = 8
+) -> aiohttp.ClientSession:
+    """Create a session tuned for the image CDN.
+
+    Keeps a small pool of keep-alive connections so concurrent page probes
+    and downloads reuse TLS sessions instead of reconnecting.
+    """
+    connector = aiohttp.TCPConnector(
+        ssl=ssl_context,
+        limit=max_connections,
+        keepalive_timeout=60,
+        ttl_dns_cache=600
+    )
+    timeout = aiohttp.ClientTimeout(total=120, connect=30)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+@lru_cache(maxsize=1024)
 def format_chapter_number(chapter: str) -> str:
-    """Format chapter number for image URL (e.g., '1' -> '0001', '200.8' -> '0200-8')."""
+    """Format chapter number for image URL (e.g., '1' -> '0001', '200.8' -> '0200-8').
+
+    Cached: every page URL of a chapter formats the same number.
+    """
     if '.' in chapter:
         main, sub = chapter.split('.', 1)
         return f"{int(main):04d}-{sub}"
@@ -46,73 +77,107 @@ def build_image_url(chapter: str, page: int) -> str:
     return f"{IMAGE_BASE}/{ch_formatted}-{page:03d}.png"
 
 
+async def _page_exists(
+    session: aiohttp.ClientSession,
+    chapter: str,
+    page: int
+) -> bool:
+    """Check whether a single page image exists (HEAD request)."""
+    url = build_image_url(chapter, page)
+    async with STEALTH_LIMITER:
+        headers = get_browser_headers(f"{BASE_URL}/chapters/{chapter}/")
+        try:
+            async with session.head(url, headers=headers, allow_redirects=True) as resp:
+                return resp.status == 200
+        except Exception:
+            return False
+
+
 async def get_chapter_page_count(
     session: aiohttp.ClientSession,
-    chapter: str
+    chapter: str,
+    max_concurrency: int = 8
 ) -> int:
-    """Determine page count by checking which pages exist."""
-    # Start checking from page 1, increment until 404
+    """Determine page count by checking which pages exist.
+
+    Probes pages 1, 2, 4, 8, ... concurrently to bracket the last page,
+    then binary-searches between the last existing and first missing page.
+    """
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def probe(page: int) -> bool:
+        async with sem:
+            return await _page_exists(session, chapter, page)
+
+    # Exponential probe (pages are numbered contiguously from 1)
+    checkpoints = []
     page = 1
-    max_pages = 100  # Safety limit
+    while page <= MAX_PAGES:
+        checkpoints.append(page)
+        page *= 2
 
-    while page <= max_pages:
-        url = build_image_url(chapter, page)
-        async with STEALTH_LIMITER:
-            headers = get_browser_headers(f"{BASE_URL}/chapters/{chapter}/")
-            try:
-                async with session.head(url, headers=headers, allow_redirects=True) as resp:
-                    if resp.status == 200:
-                        page += 1
-                    else:
-                        break
-            except Exception:
-                break
+    results = await asyncio.gather(*(probe(p) for p in checkpoints))
 
-        # Check in batches to be faster
-        if page % 10 == 0:
-            await asyncio.sleep(0.5)
+    last_found = 0  # Last page known to exist
+    first_missing = MAX_PAGES + 1  # First page known to be missing
+    for page, exists in zip(checkpoints, results):
+        if not exists:
+            first_missing = page
+            break
+        last_found = page
 
-    return page - 1
+    # Binary search for the boundary
+    while first_missing - last_found > 1:
+        mid = (last_found + first_missing) // 2
+        if await probe(mid):
+            last_found = mid
+        else:
+            first_missing = mid
+
+    return last_found
 
 
 async def get_chapter_info(
     session: aiohttp.ClientSession,
-    chapter: str
+    chapter: str,
+    fast_path: bool = False
 ) -> Optional[COTNChapter]:
-    """Get chapter info including all image URLs."""
-    # First, verify the chapter page exists
+    """Get chapter info including all image URLs.
+
+    With fast_path=True the chapter HTML is not fetched; image URLs are
+    built from the known CDN schema and the page count is probed directly.
+    """
     chapter_url = f"{BASE_URL}/chapters/{chapter}/"
 
-    async with STEALTH_LIMITER:
-        headers = get_browser_headers()
-        try:
-            async with session.get(chapter_url, headers=headers) as resp:
-                if resp.status != 200:
-                    logger.error(f"Chapter {chapter} not found: {resp.status}")
-                    return None
-                html = await resp.text()
-        except Exception as e:
-            logger.error(f"Error fetching chapter {chapter}: {e}")
-            return None
-
-    # Extract page count from HTML (look for image URLs)
-    # Pattern: official.lowee.us/manga/Yofukashi-no-Uta/XXXX-YYY.png
-    pattern = rf'{IMAGE_BASE.replace(".", r"\.")}/[^"]+\.png'
-    matches = re.findall(pattern, html)
-
-    if matches:
-        # Deduplicate and sort
-        unique_urls = sorted(set(matches))
-        page_count = len(unique_urls)
-        logger.info(f"Chapter {chapter}: found {page_count} pages in HTML")
-        return COTNChapter(
-            number=chapter,
-            url=chapter_url,
-            page_count=page_count,
-            image_urls=unique_urls
-        )
-
-    # Fallback: probe for pages
+    if not fast_path:
+        # First, verify the chapter page exists
+        async with STEALTH_LIMITER:
+            headers = get_browser_headers()
+            try:
+                async with session.get(chapter_url, headers=headers) as resp:
+                    if resp.status != 200:
+                        logger.error(f"Chapter {chapter} not found: {resp.status}")
+                        return None
+                    html = await resp.text()
+            except Exception as e:
+                logger.error(f"Error fetching chapter {chapter}: {e}")
+                return None
+
+        # Extract page count from HTML (look for image URLs), deduplicating during the scan
+        matches = {m.group(0) for m in _IMG_RE.finditer(html)}
+
+        if matches:
+            unique_urls = sorted(matches)
+            page_count = len(unique_urls)
+            logger.info(f"Chapter {chapter}: found {page_count} pages in HTML")
+            return COTNChapter(
+                number=chapter,
+                url=chapter_url,
+                page_count=page_count,
+                image_urls=unique_urls
+            )
+
+    # Fast path / fallback: probe for pages
     logger.info(f"Chapter {chapter}: probing for pages...")
     page_count = await get_chapter_page_count(session, chapter)
 
@@ -145,29 +210,26 @@ async def get_all_chapters(session: aiohttp.ClientSession) -> list[str]:
             logger.error(f"Error fetching main page: {e}")
             return []
 
-    # Extract chapter links: /chapters/XXX/
-    pattern = r'/chapters/([0-9]+(?:-[0-9]+)?(?:\.[0-9]+)?)'
-    matches = re.findall(pattern, html)
-
-    # Normalize: "200-8" -> "200.8" for consistency
-    chapters = []
-    for ch in set(matches):
-        # Convert URL format to number format
-        if '-' in ch and not ch.startswith('-'):
+    # Extract chapter links, deduplicating on the normalized number while scanning
+    # (chapter number -> numeric sort key)
+    seen: dict[str, float] = {}
+    for match in _CH_RE.finditer(html):
+        ch = match.group(1)
+        # Normalize: "200-8" -> "200.8" for consistency
+        if '-' in ch:
             # Check if it's like "200-8" (subchapter) vs just a number
             parts = ch.split('-')
             if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
                 ch = f"{parts[0]}.{parts[1]}"
-        chapters.append(ch)
 
-    # Sort numerically
-    def sort_key(x):
-        try:
-            return float(x.replace('-', '.'))
-        except ValueError:
-            return 0
+        if ch not in seen:
+            try:
+                seen[ch] = float(ch.replace('-', '.'))
+            except ValueError:
+                seen[ch] = 0.0
 
-    chapters = sorted(set(chapters), key=sort_key)
+    # Sort numerically
+    chapters = sorted(seen, key=seen.__getitem__)
     logger.info(f"Found {len(chapters)} chapters")
 
     return chapters
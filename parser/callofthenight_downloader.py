@@ -4,14 +4,15 @@ Downloader for callofthenight.space chapters.
 
 import asyncio
 import logging
-import zipfile
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Optional, TypeVar
 
 import aiohttp
-import aiofiles
 
+from async_write import write_all
 from callofthenight_client import COTNChapter, get_chapter_info, BASE_URL
+from downloader import build_zip
 from stealth import (
     STEALTH_LIMITER, get_image_headers,
     page_delay, rate_limit_backoff
@@ -20,16 +21,22 @@ from stealth import (
 logger = logging.getLogger(__name__)
 
 MAX_RETRIES = 5
+CHUNK_SIZE = 64 * 1024  # Streaming buffer for image bodies
 
+T = TypeVar("T")
 
-async def download_image(
+
+async def _get_with_retries(
     session: aiohttp.ClientSession,
     url: str,
-    dest: Path,
     referer: str,
+    consume: Callable[[aiohttp.ClientResponse], Awaitable[T]],
     retries: int = MAX_RETRIES
-) -> bool:
-    """Download a single image with retries."""
+) -> Optional[T]:
+    """GET url with retries; on 200 hand the response to consume().
+
+    Returns consume()'s result, or None if every attempt failed.
+    """
     for attempt in range(retries):
         try:
             async with STEALTH_LIMITER:
@@ -48,13 +55,9 @@ async def download_image(
                             await rate_limit_backoff(attempt)
                             continue
                         logger.error(f"Failed: {url} -> {resp.status}")
-                        return False
+                        return None
 
-                    content = await resp.read()
-                    dest.parent.mkdir(parents=True, exist_ok=True)
-                    async with aiofiles.open(dest, "wb") as f:
-                        await f.write(content)
-                    return True
+                    return await consume(resp)
 
         except asyncio.TimeoutError:
             logger.warning(f"Timeout: {url} (attempt {attempt + 1})")
@@ -65,17 +68,43 @@ async def download_image(
             if attempt < retries - 1:
                 await rate_limit_backoff(attempt)
 
-    return False
+    return None
+
+
+async def download_image(
+    session: aiohttp.ClientSession,
+    url: str,
+    dest: Path,
+    referer: str,
+    retries: int = MAX_RETRIES
+) -> bool:
+    """Download a single image to disk with retries.
+
+    dest.parent must already exist (created once per chapter by the caller).
+    """
+    async def write_to_disk(resp: aiohttp.ClientResponse) -> bool:
+        # Stream to a .part file so an interrupted download is never
+        # mistaken for a finished page
+        part = dest.with_name(dest.name + ".part")
+        await write_all(part, resp.content.iter_chunked(CHUNK_SIZE))
+        part.replace(dest)
+        return True
+
+    return bool(await _get_with_retries(session, url, referer, write_to_disk, retries))
 
 
 async def download_chapter(
     session: aiohttp.ClientSession,
     chapter: COTNChapter,
     output_dir: Path,
-    temp_dir: Path
+    temp_dir: Path,
+    max_concurrency: int = 4
 ) -> Optional[Path]:
     """Download chapter and create ZIP archive.
 
+    Pages are streamed to per-page files in temp_dir, at most max_concurrency
+    at a time; pages left by an interrupted run are reused. The ZIP is only
+    built (off the event loop) once every page is on disk.
     Returns path to ZIP file or None if failed.
     """
     # Format chapter number for filename (e.g., "1" -> "001", "200.8" -> "200.8")
@@ -95,38 +124,56 @@ async def download_chapter(
     # Create temp directory
     chapter_temp = temp_dir / f"ch{chapter.number}_en"
     chapter_temp.mkdir(parents=True, exist_ok=True)
+    # Pages left by an earlier run (one readdir instead of a stat per page)
+    existing = set(os.listdir(chapter_temp))
 
-    # Download all pages
-    downloaded_files = []
     referer = chapter.url
+    sem = asyncio.Semaphore(max_concurrency)
+    total = len(chapter.image_urls)
 
-    for idx, url in enumerate(chapter.image_urls, 1):
+    async def download_page(idx: int, url: str) -> Optional[Path]:
         # Determine extension from URL
         ext = Path(url).suffix or ".png"
         page_file = chapter_temp / f"{idx:03d}{ext}"
 
-        if page_file.exists():
-            downloaded_files.append(page_file)
-            continue
+        if page_file.name in existing:
+            return page_file
+
+        async with sem:
+            logger.info(f"  Page {idx}/{total}")
 
-        logger.info(f"  Page {idx}/{len(chapter.image_urls)}")
+            ok = await download_image(session, url, page_file, referer)
+            await page_delay()
 
-        if await download_image(session, url, page_file, referer):
-            downloaded_files.append(page_file)
-        else:
+        if not ok:
             logger.error(f"  Failed page {idx}")
+            return None
+        return page_file
 
-        await page_delay()
+    results = await asyncio.gather(
+        *(download_page(idx, url) for idx, url in enumerate(chapter.image_urls, 1)),
+        return_exceptions=True
+    )
 
-    if not downloaded_files:
-        logger.error(f"No pages downloaded for chapter {chapter.number}")
+    downloaded_files = []
+    for idx, result in enumerate(results, 1):
+        if isinstance(result, BaseException):
+            logger.error(f"  Failed page {idx}: {result}")
+        elif result is not None:
+            downloaded_files.append(result)
+
+    # An incomplete chapter is not zipped, so a later run retries just the
+    # missing pages instead of skipping it as "Already exists"
+    if not downloaded_files or len(downloaded_files) != total:
+        logger.error(f"Chapter {chapter.number}: got {len(downloaded_files)}/{total} pages, not saving")
         return None
 
-    # Create ZIP
+    # Create ZIP off the event loop; the .part name keeps an interrupted
+    # write from looking complete
     output_dir.mkdir(parents=True, exist_ok=True)
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for page_file in sorted(downloaded_files):
-            zf.write(page_file, page_file.name)
+    part_path = zip_path.with_name(zip_name + ".part")
+    await asyncio.to_thread(build_zip, part_path, downloaded_files)
+    part_path.replace(zip_path)
 
     logger.info(f"Created {zip_name} ({len(downloaded_files)} pages)")
     return zip_path
@@ -136,12 +183,16 @@ async def download_chapter_by_number(
     session: aiohttp.ClientSession,
     chapter_num: str,
     output_dir: Path,
-    temp_dir: Path
+    temp_dir: Path,
+    fast_path: bool = False
 ) -> Optional[Path]:
-    """Download a chapter by its number."""
+    """Download a chapter by its number.
+
+    fast_path skips the chapter HTML and probes the image CDN directly.
+    """
     logger.info(f"Fetching chapter {chapter_num} info...")
 
-    chapter = await get_chapter_info(session, chapter_num)
+    chapter = await get_chapter_info(session, chapter_num, fast_path=fast_path)
     if not chapter:
         return None
 
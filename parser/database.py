@@ -1,16 +1,29 @@
 """SQLite database for tracking manga downloads."""
 
+import asyncio
+import atexit
+import re
 import sqlite3
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from util import make_slug
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_DB_PATH = Path(__file__).parent.parent / "manga_tracker.db"
 
+# MangaDex title URL: .../title/{id}[/slug]; the id is the whole next path
+# segment, whatever its case or format
+_TITLE_RE = re.compile(r'(?:^|/)title/([^/]+)')
+
 
 @dataclass
 class MangaRecord:
@@ -28,62 +41,140 @@ class MangaRecord:
     updated_at: str
 
 
+# Performance pragmas applied to every connection. synchronous, cache_size,
+# temp_store and mmap_size are per-connection, so they live here rather than
+# in init_database (journal_mode=WAL persists in the file either way).
+_PRAGMAS = """
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA cache_size = -32000;
+    PRAGMA temp_store = MEMORY;
+"""
+
+# One cached connection per (thread, database file) (see get_connection)
+_LOCAL = threading.local()
+_ALL_CONNS: list[sqlite3.Connection] = []
+_ALL_CONNS_LOCK = threading.Lock()
+
+# Single worker so async callers never touch SQLite concurrently
+_DB_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+
+
+# Manga rows with their downloaded chapter count, aggregated once via a join
+_MANGA_SELECT = """
+    SELECT m.*, COALESCE(dc.c, 0) AS downloaded_chapters
+    FROM manga m
+    LEFT JOIN (
+        SELECT manga_id, COUNT(*) AS c FROM downloaded_chapters GROUP BY manga_id
+    ) dc ON dc.manga_id = m.id
+"""
+
+
 def get_connection(db_path: Path = DEFAULT_DB_PATH) -> sqlite3.Connection:
-    """Get database connection."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    """Get database connection.
+
+    Connections are cached per thread and db_path and reused for the life of
+    the process; they run in autocommit mode and are closed at exit. Each
+    thread (e.g. the main thread and the DB worker behind the a_* wrappers)
+    has its own connection, so their transactions never interleave.
+    """
+    db_path = Path(db_path)
+    conns = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_PRAGMAS)
+        conns[db_path] = conn
+        with _ALL_CONNS_LOCK:
+            _ALL_CONNS.append(conn)
     return conn
 
 
+@contextmanager
+def transaction(db_path: Path = DEFAULT_DB_PATH):
+    """Group several writes into one transaction (one commit)."""
+    conn = get_connection(db_path)
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        # BaseException too: a cancelled task must not leave the cached
+        # connection inside an open transaction
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+@atexit.register
+def close_connections():
+    """Close all cached database connections."""
+    with _ALL_CONNS_LOCK:
+        while _ALL_CONNS:
+            _ALL_CONNS.pop().close()
+
+
 def init_database(db_path: Path = DEFAULT_DB_PATH):
     """Initialize database schema."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
-
-        # Manga table - tracks all manga we want to download
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS manga (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                mangadex_id TEXT UNIQUE NOT NULL,
-                title TEXT NOT NULL,
-                slug TEXT NOT NULL,
-                mangadex_url TEXT NOT NULL,
-                total_chapters_en INTEGER,
-                total_chapters_es INTEGER,
-                status TEXT DEFAULT 'wishlist',
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Downloaded chapters table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS downloaded_chapters (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                manga_id INTEGER NOT NULL,
-                chapter_number TEXT NOT NULL,
-                language TEXT NOT NULL,
-                zip_path TEXT,
-                page_count INTEGER,
-                downloaded_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (manga_id) REFERENCES manga(id),
-                UNIQUE(manga_id, chapter_number, language)
-            )
-        """)
-
-        # Create indexes
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_manga_mangadex_id ON manga(mangadex_id)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_chapters_manga_id ON downloaded_chapters(manga_id)
-        """)
-
-        conn.commit()
-        logger.info(f"Database initialized: {db_path}")
-    finally:
-        conn.close()
+    cursor = conn.cursor()
+
+    # Manga table - tracks all manga we want to download
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS manga (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            mangadex_id TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            slug TEXT NOT NULL,
+            mangadex_url TEXT NOT NULL,
+            total_chapters_en INTEGER,
+            total_chapters_es INTEGER,
+            status TEXT DEFAULT 'wishlist',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Downloaded chapters table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS downloaded_chapters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            manga_id INTEGER NOT NULL,
+            chapter_number TEXT NOT NULL,
+            language TEXT NOT NULL,
+            zip_path TEXT,
+            page_count INTEGER,
+            downloaded_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (manga_id) REFERENCES manga(id),
+            UNIQUE(manga_id, chapter_number, language)
+        )
+    """)
+
+    # Cached API responses (ETag + JSON body) for conditional requests
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS api_cache (
+            cache_key TEXT PRIMARY KEY,
+            etag TEXT NOT NULL,
+            body TEXT NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create indexes
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_manga_mangadex_id ON manga(mangadex_id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chapters_manga_id ON downloaded_chapters(manga_id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chapters_manga_lang ON downloaded_chapters(manga_id, language)
+    """)
+
+    logger.info(f"Database initialized: {db_path}")
 
 
 def add_manga(
@@ -95,93 +186,81 @@ def add_manga(
 ) -> int:
     """Add manga to database. Returns manga id."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
+    cursor = conn.cursor()
 
-        slug = title.lower().replace(" ", "-").replace(":", "").replace("!", "")
+    slug = make_slug(title)
 
-        cursor.execute("""
-            INSERT INTO manga (mangadex_id, title, slug, mangadex_url, status)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(mangadex_id) DO UPDATE SET
-                title = excluded.title,
-                mangadex_url = excluded.mangadex_url,
-                updated_at = CURRENT_TIMESTAMP
-        """, (mangadex_id, title, slug, mangadex_url, status))
+    cursor.execute("""
+        INSERT INTO manga (mangadex_id, title, slug, mangadex_url, status)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(mangadex_id) DO UPDATE SET
+            title = excluded.title,
+            mangadex_url = excluded.mangadex_url,
+            updated_at = CURRENT_TIMESTAMP
+    """, (mangadex_id, title, slug, mangadex_url, status))
 
-        conn.commit()
-        manga_id = cursor.lastrowid or get_manga_by_mangadex_id(mangadex_id, db_path).id
-        return manga_id
-    finally:
-        conn.close()
+    # lastrowid is stale on a shared connection when the upsert hits the
+    # UPDATE branch, so always look the id up
+    cursor.execute("SELECT id FROM manga WHERE mangadex_id = ?", (mangadex_id,))
+    return cursor.fetchone()["id"]
 
 
 def get_manga_by_mangadex_id(mangadex_id: str, db_path: Path = DEFAULT_DB_PATH) -> Optional[MangaRecord]:
     """Get manga by MangaDex ID."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT m.*,
-                   (SELECT COUNT(*) FROM downloaded_chapters dc WHERE dc.manga_id = m.id) as downloaded_chapters
-            FROM manga m
-            WHERE m.mangadex_id = ?
-        """, (mangadex_id,))
-
-        row = cursor.fetchone()
-
-        if row:
-            return MangaRecord(
-                id=row["id"],
-                mangadex_id=row["mangadex_id"],
-                title=row["title"],
-                slug=row["slug"],
-                mangadex_url=row["mangadex_url"],
-                total_chapters_en=row["total_chapters_en"],
-                total_chapters_es=row["total_chapters_es"],
-                downloaded_chapters=row["downloaded_chapters"],
-                status=row["status"],
-                created_at=row["created_at"],
-                updated_at=row["updated_at"]
-            )
-        return None
-    finally:
-        conn.close()
+    cursor = conn.cursor()
+
+    cursor.execute(f"""
+        {_MANGA_SELECT}
+        WHERE m.mangadex_id = ?
+    """, (mangadex_id,))
+
+    row = cursor.fetchone()
+
+    if row:
+        return MangaRecord(
+            id=row["id"],
+            mangadex_id=row["mangadex_id"],
+            title=row["title"],
+            slug=row["slug"],
+            mangadex_url=row["mangadex_url"],
+            total_chapters_en=row["total_chapters_en"],
+            total_chapters_es=row["total_chapters_es"],
+            downloaded_chapters=row["downloaded_chapters"],
+            status=row["status"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"]
+        )
+    return None
 
 
 def get_manga_by_slug(slug: str, db_path: Path = DEFAULT_DB_PATH) -> Optional[MangaRecord]:
     """Get manga by slug."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT m.*,
-                   (SELECT COUNT(*) FROM downloaded_chapters dc WHERE dc.manga_id = m.id) as downloaded_chapters
-            FROM manga m
-            WHERE m.slug = ?
-        """, (slug,))
-
-        row = cursor.fetchone()
-
-        if row:
-            return MangaRecord(
-                id=row["id"],
-                mangadex_id=row["mangadex_id"],
-                title=row["title"],
-                slug=row["slug"],
-                mangadex_url=row["mangadex_url"],
-                total_chapters_en=row["total_chapters_en"],
-                total_chapters_es=row["total_chapters_es"],
-                downloaded_chapters=row["downloaded_chapters"],
-                status=row["status"],
-                created_at=row["created_at"],
-                updated_at=row["updated_at"]
-            )
-        return None
-    finally:
-        conn.close()
+    cursor = conn.cursor()
+
+    cursor.execute(f"""
+        {_MANGA_SELECT}
+        WHERE m.slug = ?
+    """, (slug,))
+
+    row = cursor.fetchone()
+
+    if row:
+        return MangaRecord(
+            id=row["id"],
+            mangadex_id=row["mangadex_id"],
+            title=row["title"],
+            slug=row["slug"],
+            mangadex_url=row["mangadex_url"],
+            total_chapters_en=row["total_chapters_en"],
+            total_chapters_es=row["total_chapters_es"],
+            downloaded_chapters=row["downloaded_chapters"],
+            status=row["status"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"]
+        )
+    return None
 
 
 def update_manga_chapter_counts(
@@ -192,33 +271,23 @@ def update_manga_chapter_counts(
 ):
     """Update total chapter counts for manga."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE manga
-            SET total_chapters_en = ?, total_chapters_es = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (total_en, total_es, manga_id))
+    cursor = conn.cursor()
 
-        conn.commit()
-    finally:
-        conn.close()
+    cursor.execute("""
+        UPDATE manga
+        SET total_chapters_en = ?, total_chapters_es = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, (total_en, total_es, manga_id))
 
 
 def update_manga_status(manga_id: int, status: str, db_path: Path = DEFAULT_DB_PATH):
     """Update manga status."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE manga SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
-        """, (status, manga_id))
+    cursor = conn.cursor()
 
-        conn.commit()
-    finally:
-        conn.close()
+    cursor.execute("""
+        UPDATE manga SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+    """, (status, manga_id))
 
 
 def add_downloaded_chapter(
@@ -230,41 +299,50 @@ def add_downloaded_chapter(
     db_path: Path = DEFAULT_DB_PATH
 ):
     """Record a downloaded chapter."""
-    conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
+    add_downloaded_chapters(
+        manga_id, [(chapter_number, language, zip_path, page_count)], db_path
+    )
 
-        cursor.execute("""
+
+def add_downloaded_chapters(
+    manga_id: int,
+    rows: list[tuple[str, str, str, int]],
+    db_path: Path = DEFAULT_DB_PATH
+):
+    """Record many downloaded chapters in a single transaction.
+
+    rows: list of (chapter_number, language, zip_path, page_count)
+    """
+    if not rows:
+        return
+
+    params = [(manga_id, ch, lang, path, pages) for ch, lang, path, pages in rows]
+
+    with transaction(db_path) as conn:
+        conn.executemany("""
             INSERT INTO downloaded_chapters (manga_id, chapter_number, language, zip_path, page_count)
             VALUES (?, ?, ?, ?, ?)
             ON CONFLICT(manga_id, chapter_number, language) DO UPDATE SET
                 zip_path = excluded.zip_path,
                 page_count = excluded.page_count,
                 downloaded_at = CURRENT_TIMESTAMP
-        """, (manga_id, chapter_number, language, zip_path, page_count))
-
-        conn.commit()
-    finally:
-        conn.close()
+        """, params)
 
 
 def get_downloaded_chapters(manga_id: int, db_path: Path = DEFAULT_DB_PATH) -> list[dict]:
     """Get all downloaded chapters for a manga."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
+    cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT chapter_number, language, zip_path, page_count, downloaded_at
-            FROM downloaded_chapters
-            WHERE manga_id = ?
-            ORDER BY CAST(chapter_number AS REAL), language
-        """, (manga_id,))
+    cursor.execute("""
+        SELECT chapter_number, language, zip_path, page_count, downloaded_at
+        FROM downloaded_chapters
+        WHERE manga_id = ?
+        ORDER BY CAST(chapter_number AS REAL), language
+    """, (manga_id,))
 
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
+    rows = cursor.fetchall()
+    return [dict(row) for row in rows]
 
 
 def is_chapter_downloaded(
@@ -275,35 +353,77 @@ def is_chapter_downloaded(
 ) -> bool:
     """Check if chapter is already downloaded."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT 1 FROM downloaded_chapters
+        WHERE manga_id = ? AND chapter_number = ? AND language = ?
+    """, (manga_id, chapter_number, language))
+
+    return cursor.fetchone() is not None
+
+
+def get_downloaded_keys(manga_id: int, db_path: Path = DEFAULT_DB_PATH) -> set[tuple[str, str]]:
+    """Get (chapter_number, language) pairs already downloaded for a manga.
+
+    One query for the whole manga; use instead of is_chapter_downloaded in loops.
+    """
+    conn = get_connection(db_path)
+    cursor = conn.execute("""
+        SELECT chapter_number, language FROM downloaded_chapters WHERE manga_id = ?
+    """, (manga_id,))
+    return {(row[0], row[1]) for row in cursor}
 
-        cursor.execute("""
-            SELECT 1 FROM downloaded_chapters
-            WHERE manga_id = ? AND chapter_number = ? AND language = ?
-        """, (manga_id, chapter_number, language))
 
-        return cursor.fetchone() is not None
-    finally:
-        conn.close()
+def get_downloaded_bilingual_count(manga_id: int, db_path: Path = DEFAULT_DB_PATH) -> int:
+    """Count chapters downloaded in both EN and ES for a manga."""
+    conn = get_connection(db_path)
+    cursor = conn.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT chapter_number FROM downloaded_chapters
+            WHERE manga_id = ? AND language IN ('en', 'es')
+            GROUP BY chapter_number
+            HAVING COUNT(DISTINCT language) = 2
+        )
+    """, (manga_id,))
+    return cursor.fetchone()[0]
+
+
+def get_cached_response(cache_key: str, db_path: Path = DEFAULT_DB_PATH) -> Optional[tuple[str, str]]:
+    """Get cached (etag, body) for an API request, or None."""
+    conn = get_connection(db_path)
+    cursor = conn.execute(
+        "SELECT etag, body FROM api_cache WHERE cache_key = ?", (cache_key,)
+    )
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def save_cached_response(cache_key: str, etag: str, body: str, db_path: Path = DEFAULT_DB_PATH):
+    """Store (etag, body) for an API request."""
+    conn = get_connection(db_path)
+    conn.execute("""
+        INSERT INTO api_cache (cache_key, etag, body) VALUES (?, ?, ?)
+        ON CONFLICT(cache_key) DO UPDATE SET
+            etag = excluded.etag,
+            body = excluded.body,
+            updated_at = CURRENT_TIMESTAMP
+    """, (cache_key, etag, body))
 
 
 def get_all_manga(db_path: Path = DEFAULT_DB_PATH) -> list[MangaRecord]:
     """Get all manga from database."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
+    cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT m.*,
-                   (SELECT COUNT(*) FROM downloaded_chapters dc WHERE dc.manga_id = m.id) as downloaded_chapters
-            FROM manga m
-            ORDER BY m.title
-        """)
+    cursor.execute(f"""
+        {_MANGA_SELECT}
+        ORDER BY m.title
+    """)
 
-        rows = cursor.fetchall()
+    rows = cursor.fetchall()
 
-        return [MangaRecord(
+    return [MangaRecord(
         id=row["id"],
         mangadex_id=row["mangadex_id"],
         title=row["title"],
@@ -316,44 +436,81 @@ def get_all_manga(db_path: Path = DEFAULT_DB_PATH) -> list[MangaRecord]:
         created_at=row["created_at"],
         updated_at=row["updated_at"]
     ) for row in rows]
-    finally:
-        conn.close()
 
 
 def get_download_stats(db_path: Path = DEFAULT_DB_PATH) -> dict:
     """Get download statistics."""
     conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
+    cursor = conn.cursor()
 
-        cursor.execute("SELECT COUNT(*) FROM manga")
-        total_manga = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM manga")
+    total_manga = cursor.fetchone()[0]
 
-        cursor.execute("SELECT COUNT(*) FROM manga WHERE status = 'completed'")
-        completed = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM manga WHERE status = 'completed'")
+    completed = cursor.fetchone()[0]
 
-        cursor.execute("SELECT COUNT(*) FROM manga WHERE status = 'wishlist'")
-        wishlist = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM manga WHERE status = 'wishlist'")
+    wishlist = cursor.fetchone()[0]
 
-        cursor.execute("SELECT COUNT(*) FROM downloaded_chapters")
-        total_chapters = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM downloaded_chapters")
+    total_chapters = cursor.fetchone()[0]
 
-        return {
-            "total_manga": total_manga,
-            "completed": completed,
-            "wishlist": wishlist,
-            "in_progress": total_manga - completed - wishlist,
-            "total_downloaded_chapters": total_chapters
-        }
-    finally:
-        conn.close()
+    return {
+        "total_manga": total_manga,
+        "completed": completed,
+        "wishlist": wishlist,
+        "in_progress": total_manga - completed - wishlist,
+        "total_downloaded_chapters": total_chapters
+    }
 
 
 def extract_mangadex_id(url: str) -> str:
     """Extract manga ID from MangaDex URL."""
     # URL format: https://mangadex.org/title/{uuid}/slug
-    parts = url.rstrip("/").split("/")
-    for i, part in enumerate(parts):
-        if part == "title" and i + 1 < len(parts):
-            return parts[i + 1]
-    raise ValueError(f"Cannot extract manga ID from URL: {url}")
+    match = _TITLE_RE.search(url)
+    if not match:
+        raise ValueError(f"Cannot extract manga ID from URL: {url}")
+    return match.group(1)
+
+
+# Async wrappers: run blocking SQLite calls off the event loop
+
+async def _run_db(func, *args, **kwargs):
+    """Run a database function on the DB worker thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_DB_EXECUTOR, partial(func, *args, **kwargs))
+
+
+async def a_add_downloaded_chapters(*args, **kwargs):
+    """Async add_downloaded_chapters."""
+    return await _run_db(add_downloaded_chapters, *args, **kwargs)
+
+
+async def a_update_manga_chapter_counts(*args, **kwargs):
+    """Async update_manga_chapter_counts."""
+    return await _run_db(update_manga_chapter_counts, *args, **kwargs)
+
+
+async def a_update_manga_status(*args, **kwargs):
+    """Async update_manga_status."""
+    return await _run_db(update_manga_status, *args, **kwargs)
+
+
+async def a_get_downloaded_keys(*args, **kwargs) -> set[tuple[str, str]]:
+    """Async get_downloaded_keys."""
+    return await _run_db(get_downloaded_keys, *args, **kwargs)
+
+
+async def a_get_downloaded_bilingual_count(*args, **kwargs) -> int:
+    """Async get_downloaded_bilingual_count."""
+    return await _run_db(get_downloaded_bilingual_count, *args, **kwargs)
+
+
+async def a_get_cached_response(*args, **kwargs) -> Optional[tuple[str, str]]:
+    """Async get_cached_response."""
+    return await _run_db(get_cached_response, *args, **kwargs)
+
+
+async def a_save_cached_response(*args, **kwargs):
+    """Async save_cached_response."""
+    return await _run_db(save_cached_response, *args, **kwargs)
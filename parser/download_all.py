@@ -17,43 +17,48 @@ Usage:
 import asyncio
 import argparse
 import logging
-import ssl
-import random
+from datetime import datetime, timedelta
 from pathlib import Path
 from dataclasses import dataclass
 
 import aiohttp
-import certifi
 
+from http_session import get_session, close_session
 from mangadex_client import (
-    get_all_manga_chapters, get_manga_cover, Chapter
+    get_all_manga_chapters, get_manga_cover,
+    scan_chapters, ResponseCache
 )
-from downloader import download_chapter_to_zip, download_cover
+from downloader import download_chapter_languages, fetch_chapter_pages, download_cover
 from database import (
-    init_database, get_all_manga, add_downloaded_chapter,
-    update_manga_chapter_counts, update_manga_status,
-    is_chapter_downloaded, get_manga_by_mangadex_id
+    init_database, get_all_manga, a_update_manga_status,
+    a_add_downloaded_chapters, a_update_manga_chapter_counts, a_get_downloaded_keys,
+    a_get_downloaded_bilingual_count, MangaRecord,
+    a_get_cached_response, a_save_cached_response
 )
-from stealth import chapter_delay, human_delay
+from stealth import human_delay
+from ratelimit import get_bucket
+from util import make_slug, setup_logging
 
 # Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("download_all.log")
-    ]
-)
+setup_logging("download_all.log")
 logger = logging.getLogger(__name__)
 
+# Chapter list pages are cached by ETag in the tracker database
+API_CACHE = ResponseCache(a_get_cached_response, a_save_cached_response)
+
 # Config
-SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
 OUTPUT_DIR = Path(__file__).parent.parent / "backup_downloads"
 TEMP_DIR = Path(__file__).parent / "temp"
 
+# Max manga scanned / downloaded at once
+SCAN_CONCURRENCY = 3
+MANGA_CONCURRENCY = 2
+
+# Completed manga are rescanned once their last DB update is older than this
+RESCAN_TTL_HOURS = 24 * 7
+
 # Excluded manga (currently downloading or special handling)
-EXCLUDED_SLUGS = ["beelzebub", "yofukashi-no-uta"]
+EXCLUDED_SLUGS = frozenset(("beelzebub", "yofukashi-no-uta"))
 
 
 @dataclass
@@ -62,81 +67,51 @@ class MangaStats:
     title: str
     mangadex_id: str
     slug: str
+    db_manga_id: int = 0
     total_en: int = 0
     total_es: int = 0
     bilingual_count: int = 0
     already_downloaded: int = 0
     to_download: int = 0
-    bilingual_chapters: dict = None  # {chapter_num: {"en": Chapter, "es": Chapter}}
+    bilingual_chapters: list = None  # [(chapter_num, en Chapter, es Chapter)] sorted by number
 
     def __post_init__(self):
         if self.bilingual_chapters is None:
-            self.bilingual_chapters = {}
-
-
-def make_slug(title: str) -> str:
-    """Create URL-friendly slug from title."""
-    return title.lower().replace(" ", "-").replace(":", "").replace("!", "")
-
-
-def filter_bilingual_chapters(chapters: list[Chapter]) -> dict[str, dict[str, Chapter]]:
-    """Group chapters by number and filter to only those with both EN and ES.
-
-    Returns dict: {chapter_number: {"en": Chapter, "es": Chapter}}
-    """
-    by_number: dict[str, dict[str, Chapter]] = {}
-
-    for ch in chapters:
-        num = ch.chapter_number
-        if num not in by_number:
-            by_number[num] = {}
-
-        # Keep the first (or best) version for each language
-        if ch.language not in by_number[num]:
-            by_number[num][ch.language] = ch
-
-    # Filter to only bilingual chapters
-    bilingual = {
-        num: langs for num, langs in by_number.items()
-        if "en" in langs and "es" in langs
-    }
-
-    return bilingual
+            self.bilingual_chapters = []
 
 
 async def scan_manga(
     session: aiohttp.ClientSession,
     mangadex_id: str,
     title: str,
-    db_manga_id: int
+    db_manga_id: int,
+    slug: str
 ) -> MangaStats:
     """Scan a single manga and return stats."""
-    slug = make_slug(title)
     stats = MangaStats(
         title=title,
         mangadex_id=mangadex_id,
-        slug=slug
+        slug=slug,
+        db_manga_id=db_manga_id
     )
 
     try:
         # Get all chapters
-        await human_delay()
-        chapters = await get_all_manga_chapters(session, mangadex_id)
+        await get_bucket("api.mangadex.org").acquire()
+        chapters = await get_all_manga_chapters(session, mangadex_id, cache=API_CACHE)
 
-        # Count by language
-        stats.total_en = len([c for c in chapters if c.language == "en"])
-        stats.total_es = len([c for c in chapters if c.language == "es"])
-
-        # Filter bilingual
-        bilingual = filter_bilingual_chapters(chapters)
+        # Count by language and filter bilingual (one pass)
+        stats.total_en, stats.total_es, bilingual = scan_chapters(chapters)
         stats.bilingual_count = len(bilingual)
-        stats.bilingual_chapters = bilingual
+        stats.bilingual_chapters = [
+            (num, bilingual[num]["en"], bilingual[num]["es"])
+            for num in bilingual
+        ]
 
-        # Count already downloaded
+        # Count already downloaded (one query for the whole manga)
+        done_keys = await a_get_downloaded_keys(db_manga_id)
         for ch_num in bilingual.keys():
-            en_dl = is_chapter_downloaded(db_manga_id, ch_num, "en")
-            es_dl = is_chapter_downloaded(db_manga_id, ch_num, "es")
-            if en_dl and es_dl:
+            if (ch_num, "en") in done_keys and (ch_num, "es") in done_keys:
                 stats.already_downloaded += 1
 
         stats.to_download = stats.bilingual_count - stats.already_downloaded
@@ -147,41 +122,82 @@ async def scan_manga(
     return stats
 
 
-async def scan_all_manga(session: aiohttp.ClientSession) -> list[MangaStats]:
-    """Scan all manga in wishlist and return stats."""
+def completed_stats(manga: MangaRecord, slug: str, bilingual_count: int) -> MangaStats:
+    """Stats for a completed manga from DB only (no API call)."""
+    return MangaStats(
+        title=manga.title,
+        mangadex_id=manga.mangadex_id,
+        slug=slug,
+        db_manga_id=manga.id,
+        total_en=manga.total_chapters_en or 0,
+        total_es=manga.total_chapters_es or 0,
+        bilingual_count=bilingual_count,
+        already_downloaded=bilingual_count
+    )
+
+
+def is_fresh(manga: MangaRecord, ttl_hours: float) -> bool:
+    """True if the manga row was updated within the last ttl_hours."""
+    try:
+        # SQLite CURRENT_TIMESTAMP: "YYYY-MM-DD HH:MM:SS" in UTC
+        updated = datetime.strptime(manga.updated_at, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return False
+    return datetime.utcnow() - updated < timedelta(hours=ttl_hours)
+
+
+async def scan_all_manga(
+    session: aiohttp.ClientSession,
+    force_rescan: bool = False,
+    rescan_after_hours: float = RESCAN_TTL_HOURS
+) -> list[MangaStats]:
+    """Scan all manga in wishlist and return stats.
+
+    Manga marked completed are taken from the DB without hitting the API
+    while their last scan is under rescan_after_hours old, unless
+    force_rescan is set; stale ones are rescanned to pick up new chapters.
+    """
     all_manga = get_all_manga()
 
-    # Filter out excluded
+    # Filter out excluded (slug computed once and reused for stats)
     manga_to_scan = [
-        m for m in all_manga
-        if make_slug(m.title) not in EXCLUDED_SLUGS
+        (m, slug) for m in all_manga
+        if (slug := make_slug(m.title)) not in EXCLUDED_SLUGS
     ]
 
     logger.info(f"Scanning {len(manga_to_scan)} manga...")
-    logger.info(f"(Excluded: {EXCLUDED_SLUGS})")
-
-    all_stats = []
-    for idx, manga in enumerate(manga_to_scan, 1):
-        logger.info(f"\n[{idx}/{len(manga_to_scan)}] Scanning: {manga.title}")
-
-        stats = await scan_manga(
-            session,
-            manga.mangadex_id,
-            manga.title,
-            manga.id
-        )
-        all_stats.append(stats)
+    logger.info(f"(Excluded: {sorted(EXCLUDED_SLUGS)})")
+
+    sem = asyncio.Semaphore(SCAN_CONCURRENCY)
+
+    async def scan_with_sem(idx: int, manga: MangaRecord, slug: str) -> MangaStats:
+        # Fast path: completed on a recent run, nothing new expected yet
+        if (manga.status == "completed" and not force_rescan
+                and is_fresh(manga, rescan_after_hours)):
+            done = await a_get_downloaded_bilingual_count(manga.id)
+            if done:
+                logger.info(f"[{idx}/{len(manga_to_scan)}] Completed, skipping scan: {manga.title}")
+                return completed_stats(manga, slug, done)
+
+        async with sem:
+            logger.info(f"[{idx}/{len(manga_to_scan)}] Scanning: {manga.title}")
+            stats = await scan_manga(
+                session,
+                manga.mangadex_id,
+                manga.title,
+                manga.id,
+                slug
+            )
 
         # Update DB with chapter counts
-        update_manga_chapter_counts(manga.id, stats.total_en, stats.total_es)
-
-        # Random longer break occasionally
-        if random.random() < 0.1:
-            pause = random.uniform(5, 15)
-            logger.info(f"Taking a short break... ({pause:.0f}s)")
-            await asyncio.sleep(pause)
+        await a_update_manga_chapter_counts(manga.id, stats.total_en, stats.total_es)
+        return stats
 
-    return all_stats
+    # Scan a few manga at a time (results keep wishlist order)
+    return list(await asyncio.gather(*(
+        scan_with_sem(idx, manga, slug)
+        for idx, (manga, slug) in enumerate(manga_to_scan, 1)
+    )))
 
 
 def print_stats(all_stats: list[MangaStats]):
@@ -238,89 +254,68 @@ async def download_manga(
     covers_output = OUTPUT_DIR / "covers" / stats.slug
     chapters_output.mkdir(parents=True, exist_ok=True)
     covers_output.mkdir(parents=True, exist_ok=True)
+    temp_output = TEMP_DIR / stats.slug
+    temp_output.mkdir(parents=True, exist_ok=True)
 
-    # Download cover
-    await human_delay()
-    try:
-        from mangadex_client import get_manga_cover
-        cover_filename = await get_manga_cover(session, stats.mangadex_id)
-        if cover_filename:
-            cover_path = covers_output / "cover.jpg"
-            if not cover_path.exists():
-                await download_cover(session, stats.mangadex_id, cover_filename, cover_path)
-    except Exception as e:
-        logger.warning(f"Failed to download cover: {e}")
+    async def fetch_cover():
+        """Download the cover alongside the first chapters."""
+        await human_delay()
+        try:
+            cover_filename = await get_manga_cover(session, stats.mangadex_id)
+            if cover_filename:
+                cover_path = covers_output / "cover.jpg"
+                if not cover_path.exists():
+                    await download_cover(session, stats.mangadex_id, cover_filename, cover_path)
+        except Exception as e:
+            logger.warning(f"Failed to download cover: {e}")
+
+    done_keys = await a_get_downloaded_keys(db_manga_id)
+
+    # Look-ahead queue: (ch_num, pending chapters, prefetched at-home info)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+    async def prefetch():
+        """Resolve @Home servers for upcoming chapters while images download."""
+        for ch_num, en_ch, es_ch in stats.bilingual_chapters:
+            # Missing languages only
+            pending = {
+                lang: ch
+                for lang, ch in (("en", en_ch), ("es", es_ch))
+                if (ch_num, lang) not in done_keys
+            }
+            if not pending:
+                continue
 
-    # Sort chapters by number
-    sorted_chapters = sorted(
-        stats.bilingual_chapters.keys(),
-        key=lambda x: float(x) if x.replace('.', '').isdigit() else 0
-    )
+            # One at-home/server API call per language
+            await get_bucket("api.mangadex.org").acquire(len(pending))
+            pages = await fetch_chapter_pages(session, pending)
+            await queue.put((ch_num, pending, pages))
+
+        await queue.put(None)
 
     downloaded = 0
-    for ch_num in sorted_chapters:
-        langs = stats.bilingual_chapters[ch_num]
-
-        # Check if already downloaded
-        en_done = is_chapter_downloaded(db_manga_id, ch_num, "en")
-        es_done = is_chapter_downloaded(db_manga_id, ch_num, "es")
-
-        if en_done and es_done:
-            continue
-
-        logger.info(f"\n--- Chapter {ch_num} ---")
-
-        # Download EN
-        if not en_done:
-            en_ch = langs["en"]
-            logger.info(f"Downloading EN ({en_ch.page_count} pages)...")
-            try:
-                zip_path = await download_chapter_to_zip(
-                    session, en_ch, chapters_output,
-                    TEMP_DIR / stats.slug, data_saver=False
-                )
-                if zip_path:
-                    add_downloaded_chapter(
-                        manga_id=db_manga_id,
-                        chapter_number=ch_num,
-                        language="en",
-                        zip_path=str(zip_path),
-                        page_count=en_ch.page_count
-                    )
-                    downloaded += 1
-            except Exception as e:
-                logger.error(f"Failed EN: {e}")
-
-            await chapter_delay()
-
-        # Download ES
-        if not es_done:
-            es_ch = langs["es"]
-            logger.info(f"Downloading ES ({es_ch.page_count} pages)...")
-            try:
-                zip_path = await download_chapter_to_zip(
-                    session, es_ch, chapters_output,
-                    TEMP_DIR / stats.slug, data_saver=False
-                )
-                if zip_path:
-                    add_downloaded_chapter(
-                        manga_id=db_manga_id,
-                        chapter_number=ch_num,
-                        language="es",
-                        zip_path=str(zip_path),
-                        page_count=es_ch.page_count
-                    )
-                    downloaded += 1
-            except Exception as e:
-                logger.error(f"Failed ES: {e}")
-
-            await chapter_delay()
-
-        # Random longer break
-        if random.random() < 0.15:
-            pause = random.uniform(15, 45)
-            logger.info(f"Taking a break... ({pause:.0f}s)")
-            await asyncio.sleep(pause)
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(fetch_cover())
+        tg.create_task(prefetch())
+
+        while (item := await queue.get()) is not None:
+            ch_num, pending, pages = item
+            logger.info(f"\n--- Chapter {ch_num} ---")
+            for lang, ch in pending.items():
+                logger.info(f"Downloading {lang.upper()} ({ch.page_count} pages)...")
+
+            # Download missing languages concurrently
+            results = await download_chapter_languages(
+                session, pending, chapters_output,
+                temp_output, data_saver=False, pages=pages
+            )
+            rows = [
+                (ch_num, lang, str(zip_path), pending[lang].page_count)
+                for lang, zip_path in results.items()
+                if zip_path
+            ]
+            await a_add_downloaded_chapters(db_manga_id, rows)
+            downloaded += len(rows)
 
     return downloaded
 
@@ -329,6 +324,10 @@ async def main():
     parser = argparse.ArgumentParser(description="Download all bilingual manga")
     parser.add_argument("--scan", action="store_true", help="Only scan and show stats")
     parser.add_argument("--manga", type=str, help="Download specific manga by title")
+    parser.add_argument("--force-rescan", action="store_true",
+                        help="Query MangaDex even for manga already marked completed")
+    parser.add_argument("--rescan-after", type=float, default=RESCAN_TTL_HOURS, metavar="HOURS",
+                        help=f"Rescan completed manga last updated more than HOURS ago (default: {RESCAN_TTL_HOURS})")
     args = parser.parse_args()
 
     logger.info("=" * 60)
@@ -341,13 +340,13 @@ async def main():
     # Initialize database
     init_database()
 
-    # Setup session
-    timeout = aiohttp.ClientTimeout(total=120, connect=30)
-    connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT, limit=2)
-
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    # Shared session (connection pool reused for the whole run)
+    session = await get_session()
+    try:
         # Scan all manga
-        all_stats = await scan_all_manga(session)
+        all_stats = await scan_all_manga(
+            session, force_rescan=args.force_rescan, rescan_after_hours=args.rescan_after
+        )
 
         # Print stats
         sorted_stats = print_stats(all_stats)
@@ -363,30 +362,32 @@ async def main():
                 logger.error(f"Manga not found: {args.manga}")
                 return
 
-        # Download
+        # Download a few manga at a time (requests are paced by the shared limiters)
         total_downloaded = 0
-        for stats in sorted_stats:
-            if stats.to_download == 0:
-                continue
-
-            db_manga = get_manga_by_mangadex_id(stats.mangadex_id)
-            if not db_manga:
-                continue
-
-            count = await download_manga(session, stats, db_manga.id)
+        sem = asyncio.Semaphore(MANGA_CONCURRENCY)
+
+        async def download_with_sem(stats: MangaStats):
+            nonlocal total_downloaded
+            async with sem:
+                try:
+                    count = await download_manga(session, stats, stats.db_manga_id)
+                except Exception as e:
+                    logger.error(f"Failed downloading {stats.title}: {e}")
+                    return
             total_downloaded += count
 
             # Update status
             if stats.to_download == count // 2:  # Divided by 2 because we count both langs
-                update_manga_status(db_manga.id, "completed")
+                await a_update_manga_status(stats.db_manga_id, "completed")
             else:
-                update_manga_status(db_manga.id, "downloading")
-
-            # Break between manga
-            if stats != sorted_stats[-1]:
-                pause = random.uniform(30, 90)
-                logger.info(f"\nSwitching to next manga, pausing... ({pause:.0f}s)\n")
-                await asyncio.sleep(pause)
+                await a_update_manga_status(stats.db_manga_id, "downloading")
+
+        async with asyncio.TaskGroup() as tg:
+            for stats in sorted_stats:
+                if stats.to_download:
+                    tg.create_task(download_with_sem(stats))
+    finally:
+        await close_session()
 
     logger.info("\n" + "=" * 60)
     logger.info(f"DONE! Total downloaded: {total_downloaded} archives")
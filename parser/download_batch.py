@@ -11,36 +11,34 @@ All downloads go to ../backup_downloads/
 
 import asyncio
 import logging
-import ssl
 import random
 from pathlib import Path
 
 import aiohttp
-import certifi
 
-from mangadex_client import get_manga_by_title, get_all_manga_chapters, get_manga_cover
-from downloader import download_chapter_to_zip, download_cover
+from http_session import get_session, close_session
+from mangadex_client import (
+    get_manga_by_title, get_all_manga_chapters, get_manga_cover,
+    scan_chapters, ResponseCache
+)
+from downloader import download_chapter_languages, download_cover
 from manifest import generate_manifest, save_manifest
 from database import (
-    init_database, add_manga, add_downloaded_chapter,
-    get_manga_by_mangadex_id, update_manga_chapter_counts,
-    update_manga_status, is_chapter_downloaded, get_downloaded_chapters
+    init_database, add_manga, get_manga_by_mangadex_id, update_manga_chapter_counts,
+    update_manga_status,
+    a_add_downloaded_chapters, a_get_downloaded_keys,
+    a_get_cached_response, a_save_cached_response
 )
-from stealth import chapter_delay, human_delay
+from stealth import human_delay
+from ratelimit import get_bucket
+from util import make_slug, setup_logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("download.log")
-    ]
-)
+setup_logging("download.log")
 logger = logging.getLogger(__name__)
 
-# SSL context
-SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+# Chapter list pages are cached by ETag in the tracker database
+API_CACHE = ResponseCache(a_get_cached_response, a_save_cached_response)
 
 # Output directories
 OUTPUT_DIR = Path(__file__).parent.parent / "backup_downloads"
@@ -52,22 +50,6 @@ MANGA_LIST = [
 ]
 
 
-def filter_bilingual_chapters(chapters: list) -> dict:
-    """Filter to chapters with both EN and ES translations."""
-    by_number = {}
-    for ch in chapters:
-        num = ch.chapter_number
-        if num not in by_number:
-            by_number[num] = {}
-        if ch.language not in by_number[num]:
-            by_number[num][ch.language] = ch
-
-    return {
-        num: langs for num, langs in by_number.items()
-        if "en" in langs and "es" in langs
-    }
-
-
 async def download_single_manga(
     session: aiohttp.ClientSession,
     manga_title: str,
@@ -88,7 +70,7 @@ async def download_single_manga(
 
     manga_id = manga["id"]
     title = manga["attributes"]["title"].get("en", manga_title)
-    manga_slug = title.lower().replace(" ", "-").replace("!", "").replace(":", "")
+    manga_slug = make_slug(title)
 
     # Add to database
     mangadex_url = f"https://mangadex.org/title/{manga_id}"
@@ -98,19 +80,20 @@ async def download_single_manga(
     logger.info(f"Found: {title}")
     logger.info(f"MangaDex ID: {manga_id}")
 
-    # Get chapters
+    # Get chapters and cover filename concurrently
     await human_delay()
     logger.info("Fetching chapter list...")
-    all_chapters = await get_all_manga_chapters(session, manga_id)
+    all_chapters, cover_filename = await asyncio.gather(
+        get_all_manga_chapters(session, manga_id, cache=API_CACHE),
+        get_manga_cover(session, manga_id)
+    )
     logger.info(f"Total chapters: {len(all_chapters)}")
 
-    # Filter bilingual
-    bilingual = filter_bilingual_chapters(all_chapters)
+    # Count by language and filter bilingual (one pass)
+    en_count, es_count, bilingual = scan_chapters(all_chapters)
     logger.info(f"Bilingual chapters (EN+ES): {len(bilingual)}")
 
     # Update DB stats
-    en_count = len([c for c in all_chapters if c.language == "en"])
-    es_count = len([c for c in all_chapters if c.language == "es"])
     if db_manga:
         update_manga_chapter_counts(db_manga.id, en_count, es_count)
 
@@ -123,64 +106,62 @@ async def download_single_manga(
     covers_output = OUTPUT_DIR / "covers" / manga_slug
     chapters_output.mkdir(parents=True, exist_ok=True)
     covers_output.mkdir(parents=True, exist_ok=True)
+    temp_output = TEMP_DIR / manga_slug
+    temp_output.mkdir(parents=True, exist_ok=True)
 
     # Download cover
-    await human_delay()
-    logger.info("Downloading cover...")
-    cover_filename = await get_manga_cover(session, manga_id)
     if cover_filename:
+        await human_delay()
+        logger.info("Downloading cover...")
         cover_path = covers_output / "cover.jpg"
         await download_cover(session, manga_id, cover_filename, cover_path)
 
     # Download chapters
     downloaded_count = 0
     total_bilingual = len(bilingual)
-    chapter_nums = sorted(
-        bilingual.keys(),
-        key=lambda x: float(x) if x.replace('.', '').isdigit() else 0
-    )
+    chapter_nums = list(bilingual)  # already in chapter order
+
+    done_keys = await a_get_downloaded_keys(db_manga.id) if db_manga else set()
 
     for idx, ch_num in enumerate(chapter_nums, 1):
         langs = bilingual[ch_num]
         logger.info(f"\n--- Chapter {ch_num} ({idx}/{total_bilingual}) ---")
 
+        pending = {}
         for lang in ["en", "es"]:
-            chapter = langs[lang]
-
             # Check if already downloaded
-            if db_manga and is_chapter_downloaded(db_manga.id, ch_num, lang):
+            if (ch_num, lang) in done_keys:
                 logger.info(f"  {lang.upper()}: already downloaded, skipping")
                 continue
 
             logger.info(f"  {lang.upper()}: downloading...")
-
-            zip_path = await download_chapter_to_zip(
-                session,
-                chapter,
-                chapters_output,
-                TEMP_DIR / manga_slug,
-                data_saver=data_saver
-            )
-
+            pending[lang] = langs[lang]
+
+        if not pending:
+            continue
+
+        # One at-home/server API call per language
+        await get_bucket("api.mangadex.org").acquire(len(pending))
+
+        # Both language versions download concurrently
+        results = await download_chapter_languages(
+            session,
+            pending,
+            chapters_output,
+            temp_output,
+            data_saver=data_saver
+        )
+
+        # Record both languages in one transaction
+        rows = []
+        for lang, zip_path in results.items():
             if zip_path and db_manga:
-                add_downloaded_chapter(
-                    manga_id=db_manga.id,
-                    chapter_number=ch_num,
-                    language=lang,
-                    zip_path=str(zip_path),
-                    page_count=chapter.page_count
-                )
-                downloaded_count += 1
+                rows.append((ch_num, lang, str(zip_path), pending[lang].page_count))
                 logger.info(f"  {lang.upper()}: done!")
-
-            # Stealth delay between language versions
-            await chapter_delay()
-
-        # Extra delay between chapters (random break)
-        if random.random() < 0.2:
-            pause = random.uniform(10, 30)
-            logger.info(f"Taking a break... ({pause:.0f}s)")
-            await asyncio.sleep(pause)
+        if rows:
+            await a_add_downloaded_chapters(db_manga.id, rows)
+            done_keys.update((ch, lang) for ch, lang, _, _ in rows)
+            downloaded_count += len(rows)
 
     # Generate manifest
     logger.info("\nGenerating manifest...")
@@ -195,9 +176,9 @@ async def download_single_manga(
 
     # Update status
     if db_manga:
-        dl_chapters = get_downloaded_chapters(db_manga.id)
-        unique_ch = set(dc["chapter_number"] for dc in dl_chapters)
-        if len(unique_ch) >= len(bilingual):
+        # Complete once every bilingual chapter has both languages recorded
+        completed = sum(1 for n in bilingual if (n, "en") in done_keys and (n, "es") in done_keys)
+        if completed >= len(bilingual):
             update_manga_status(db_manga.id, "completed")
             logger.info("Marked as COMPLETED!")
 
@@ -217,11 +198,9 @@ async def main():
     # Initialize database
     init_database()
 
-    # Create session with timeout
-    timeout = aiohttp.ClientTimeout(total=60, connect=10)
-    connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT, limit=2)
-
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    # Shared session (connection pool reused for the whole run)
+    session = await get_session()
+    try:
         for i, manga_title in enumerate(MANGA_LIST):
             try:
                 await download_single_manga(session, manga_title)
@@ -234,6 +213,8 @@ async def main():
                 pause = random.uniform(30, 60)
                 logger.info(f"\nPausing before next manga... ({pause:.0f}s)\n")
                 await asyncio.sleep(pause)
+    finally:
+        await close_session()
 
     logger.info("\n" + "="*60)
     logger.info("All downloads completed!")
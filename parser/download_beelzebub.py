@@ -10,58 +10,37 @@ Usage:
 import asyncio
 import argparse
 import logging
-import ssl
-import random
 from pathlib import Path
 
-import aiohttp
-import certifi
-
+from http_session import get_session, close_session
 from mangadex_client import (
-    get_manga_by_title, get_all_manga_chapters, get_manga_cover, Chapter
+    get_manga_by_title, get_all_manga_chapters, get_manga_cover,
+    scan_chapters, ResponseCache
 )
-from downloader import download_chapter_to_zip, download_cover
+from downloader import download_chapter_languages, download_cover
 from manifest import generate_manifest, save_manifest
 from database import (
-    init_database, add_manga, add_downloaded_chapter,
-    get_manga_by_mangadex_id, update_manga_chapter_counts,
-    update_manga_status, is_chapter_downloaded, get_downloaded_chapters
+    init_database, add_manga, get_manga_by_mangadex_id, update_manga_chapter_counts,
+    update_manga_status,
+    a_add_downloaded_chapters, a_get_downloaded_keys,
+    a_get_cached_response, a_save_cached_response
 )
-from stealth import chapter_delay, human_delay
+from stealth import human_delay
+from ratelimit import get_bucket
+from util import make_slug, setup_logging
 
 # Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("download_beelzebub.log")
-    ]
-)
+setup_logging("download_beelzebub.log")
 logger = logging.getLogger(__name__)
 
+# Chapter list pages are cached by ETag in the tracker database
+API_CACHE = ResponseCache(a_get_cached_response, a_save_cached_response)
+
 # Config
-SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
 OUTPUT_DIR = Path(__file__).parent.parent / "backup_downloads"
 TEMP_DIR = Path(__file__).parent / "temp"
 
 
-def filter_bilingual_chapters(chapters: list[Chapter]) -> dict[str, dict[str, Chapter]]:
-    """Filter to chapters with both EN and ES."""
-    by_number = {}
-    for ch in chapters:
-        num = ch.chapter_number
-        if num not in by_number:
-            by_number[num] = {}
-        if ch.language not in by_number[num]:
-            by_number[num][ch.language] = ch
-
-    return {
-        num: langs for num, langs in by_number.items()
-        if "en" in langs and "es" in langs
-    }
-
-
 async def main():
     parser = argparse.ArgumentParser(description="Download Beelzebub")
     parser.add_argument("--start", type=int, default=1, help="Start chapter")
@@ -79,11 +58,9 @@ async def main():
     # Initialize database
     init_database()
 
-    # Setup session
-    timeout = aiohttp.ClientTimeout(total=120, connect=30)
-    connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT, limit=2)
-
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    # Shared session (connection pool reused for the whole run)
+    session = await get_session()
+    try:
         # Find manga
         await human_delay()
         logger.info("Searching for Beelzebub...")
@@ -95,7 +72,7 @@ async def main():
 
         manga_id = manga["id"]
         title = manga["attributes"]["title"].get("en", "Beelzebub")
-        manga_slug = title.lower().replace(" ", "-")
+        manga_slug = make_slug(title)
 
         logger.info(f"Found: {title}")
         logger.info(f"ID: {manga_id}")
@@ -105,22 +82,22 @@ async def main():
         add_manga(manga_id, title, mangadex_url, status="downloading")
         db_manga = get_manga_by_mangadex_id(manga_id)
 
-        # Get chapters
+        # Get chapters and cover filename concurrently
         await human_delay()
         logger.info("Fetching chapters...")
-        all_chapters = await get_all_manga_chapters(session, manga_id)
+        all_chapters, cover_filename = await asyncio.gather(
+            get_all_manga_chapters(session, manga_id, cache=API_CACHE),
+            get_manga_cover(session, manga_id)
+        )
         logger.info(f"Total chapters: {len(all_chapters)}")
 
-        # Count by language
-        en_count = len([c for c in all_chapters if c.language == "en"])
-        es_count = len([c for c in all_chapters if c.language == "es"])
+        # Count by language and filter bilingual (one pass)
+        en_count, es_count, bilingual = scan_chapters(all_chapters)
         logger.info(f"EN: {en_count}, ES: {es_count}")
 
         if db_manga:
             update_manga_chapter_counts(db_manga.id, en_count, es_count)
 
-        # Filter bilingual
-        bilingual = filter_bilingual_chapters(all_chapters)
         logger.info(f"Bilingual (EN+ES): {len(bilingual)}")
 
         if not bilingual:
@@ -148,23 +125,22 @@ async def main():
         covers_output = OUTPUT_DIR / "covers" / manga_slug
         chapters_output.mkdir(parents=True, exist_ok=True)
         covers_output.mkdir(parents=True, exist_ok=True)
+        temp_output = TEMP_DIR / manga_slug
+        temp_output.mkdir(parents=True, exist_ok=True)
 
         # Download cover
-        await human_delay()
-        logger.info("Downloading cover...")
-        cover_filename = await get_manga_cover(session, manga_id)
         if cover_filename:
+            await human_delay()
+            logger.info("Downloading cover...")
             await download_cover(session, manga_id, cover_filename, covers_output / "cover.jpg")
 
-        # Sort chapters
-        chapter_nums = sorted(
-            bilingual.keys(),
-            key=lambda x: float(x) if x.replace('.', '').isdigit() else 0
-        )
+        # Chapters are already in order (scan_chapters sorts them)
+        chapter_nums = list(bilingual)
 
         # Download chapters
         downloaded = 0
         total = len(chapter_nums)
+        done_keys = await a_get_downloaded_keys(db_manga.id) if db_manga else set()
 
         for idx, ch_num in enumerate(chapter_nums, 1):
             langs = bilingual[ch_num]
@@ -172,42 +148,41 @@ async def main():
             logger.info(f"Chapter {ch_num} ({idx}/{total})")
             logger.info(f"{'='*40}")
 
+            pending = {}
             for lang in ["en", "es"]:
-                chapter = langs[lang]
-
                 # Check if already downloaded
-                if db_manga and is_chapter_downloaded(db_manga.id, ch_num, lang):
+                if (ch_num, lang) in done_keys:
                     logger.info(f"  {lang.upper()}: already downloaded")
                     continue
 
                 logger.info(f"  {lang.upper()}: downloading...")
-
-                zip_path = await download_chapter_to_zip(
-                    session,
-                    chapter,
-                    chapters_output,
-                    TEMP_DIR / manga_slug,
-                    data_saver=args.data_saver
-                )
-
+                pending[lang] = langs[lang]
+
+            if not pending:
+                continue
+
+            # One at-home/server API call per language
+            await get_bucket("api.mangadex.org").acquire(len(pending))
+
+            # Both language versions download concurrently
+            results = await download_chapter_languages(
+                session,
+                pending,
+                chapters_output,
+                temp_output,
+                data_saver=args.data_saver
+            )
+
+            # Record both languages in one transaction
+            rows = []
+            for lang, zip_path in results.items():
                 if zip_path and db_manga:
-                    add_downloaded_chapter(
-                        manga_id=db_manga.id,
-                        chapter_number=ch_num,
-                        language=lang,
-                        zip_path=str(zip_path),
-                        page_count=chapter.page_count
-                    )
-                    downloaded += 1
+                    rows.append((ch_num, lang, str(zip_path), pending[lang].page_count))
                     logger.info(f"  {lang.upper()}: done!")
-
-                await chapter_delay()
-
-            # Random longer break (20% chance)
-            if random.random() < 0.2:
-                pause = random.uniform(20, 60)
-                logger.info(f"\nTaking a break... ({pause:.0f}s)")
-                await asyncio.sleep(pause)
+            if rows:
+                await a_add_downloaded_chapters(db_manga.id, rows)
+                done_keys.update((ch, lang) for ch, lang, _, _ in rows)
+                downloaded += len(rows)
 
         # Generate manifest
         logger.info("\nGenerating manifest...")
@@ -222,9 +197,9 @@ async def main():
 
         # Update status
         if db_manga:
-            dl_chapters = get_downloaded_chapters(db_manga.id)
-            unique_ch = set(dc["chapter_number"] for dc in dl_chapters)
-            if len(unique_ch) >= len(bilingual):
+            # Complete once every bilingual chapter has both languages recorded
+            completed = sum(1 for n in bilingual if (n, "en") in done_keys and (n, "es") in done_keys)
+            if completed >= len(bilingual):
                 update_manga_status(db_manga.id, "completed")
                 logger.info("Marked as COMPLETED!")
 
@@ -232,6 +207,8 @@ async def main():
         logger.info(f"DONE! Downloaded {downloaded} new files")
         logger.info(f"Bilingual chapters available: {len(bilingual)}")
         logger.info("="*60)
+    finally:
+        await close_session()
 
 
 if __name__ == "__main__":
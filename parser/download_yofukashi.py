@@ -16,40 +16,46 @@ Usage:
 import asyncio
 import argparse
 import logging
+import os
 import ssl
 import random
 from pathlib import Path
+from typing import Optional
 
 import aiohttp
 import certifi
 
 # MangaDex imports
-from mangadex_client import get_manga_by_title, get_all_manga_chapters, get_manga_cover
-from downloader import download_chapter_to_zip, download_cover
+from mangadex_client import (
+    get_manga_by_title, get_all_manga_chapters, get_manga_cover, ResponseCache
+)
+from downloader import download_chapter_to_zip, download_cover, build_zip, count_zip_entries
 
 # CallOfTheNight imports
-from callofthenight_client import get_all_chapters, get_chapter_info, build_image_url, COTNChapter, BASE_URL
+from callofthenight_client import (
+    get_all_chapters, get_chapter_info, build_image_url, COTNChapter, BASE_URL,
+    create_session as create_cotn_session
+)
 from callofthenight_downloader import download_chapter, download_image
 
 # Common imports
 from database import (
-    init_database, add_manga, add_downloaded_chapter,
+    init_database, add_manga, add_downloaded_chapters,
     get_manga_by_mangadex_id, update_manga_chapter_counts,
-    update_manga_status, is_chapter_downloaded, get_downloaded_chapters
+    update_manga_status, get_downloaded_chapters, get_downloaded_keys,
+    a_get_cached_response, a_save_cached_response
 )
-from stealth import chapter_delay, human_delay
+from stealth import STEALTH_LIMITER, chapter_delay, human_delay
+
+from util import chapter_sort_key, setup_logging
 
 # Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("download_yofukashi.log")
-    ]
-)
+setup_logging("download_yofukashi.log")
 logger = logging.getLogger(__name__)
 
+# Chapter list pages are cached by ETag in the tracker database
+API_CACHE = ResponseCache(a_get_cached_response, a_save_cached_response)
+
 # Config
 SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
 OUTPUT_DIR = Path(__file__).parent.parent / "backup_downloads"
@@ -62,19 +68,28 @@ MANGADEX_ID = "259dfd8a-f06a-4825-8fa6-a2dcd7274230"
 # Image server base
 IMAGE_BASE = "https://official.lowee.us/manga/Yofukashi-no-Uta"
 
+# Pages of one chapter downloaded in parallel
+PAGE_CONCURRENCY = 3
+
+# Downloaded chapters recorded per DB transaction
+DB_BATCH_SIZE = 20
+
 
 async def probe_and_download_chapter(
     session: aiohttp.ClientSession,
     chapter_num: str,
     output_dir: Path,
-    temp_dir: Path
+    temp_dir: Path,
+    existing_zips: Optional[frozenset[str]] = None
 ) -> tuple[Path | None, int]:
     """Probe image server and download chapter directly.
 
+    existing_zips: snapshot of ZIP names in output_dir, to skip a stat per chapter.
+    It is listed once per run, so ZIPs created or removed after that are not
+    seen; pass None to stat the file instead.
     Returns (zip_path, page_count) or (None, 0) if chapter doesn't exist.
     """
-    import zipfile
-    from stealth import page_delay, STEALTH_LIMITER, get_image_headers
+    from stealth import page_delay, get_image_headers
 
     # Format chapter number for filename
     ch_padded = chapter_num.zfill(3)
@@ -82,11 +97,15 @@ async def probe_and_download_chapter(
     zip_path = output_dir / zip_name
 
     # Skip if already exists on disk
-    if zip_path.exists():
+    if existing_zips is not None:
+        already_exists = zip_name in existing_zips
+    else:
+        already_exists = zip_path.exists()
+
+    if already_exists:
         logger.info(f"Already exists: {zip_name}")
         # Count pages in existing zip
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            return zip_path, len(zf.namelist())
+        return zip_path, await asyncio.to_thread(count_zip_entries, zip_path)
 
     # Probe first page to check if chapter exists
     first_page_url = build_image_url(chapter_num, 1)
@@ -94,7 +113,7 @@ async def probe_and_download_chapter(
     async with STEALTH_LIMITER:
         headers = get_image_headers(BASE_URL)
         try:
-            async with session.head(first_page_url, headers=headers) as resp:
+            async with session.head(first_page_url, headers=headers, allow_redirects=False) as resp:
                 if resp.status != 200:
                     logger.debug(f"Chapter {chapter_num} not found on server")
                     return None, 0
@@ -105,62 +124,75 @@ async def probe_and_download_chapter(
     # Chapter exists, find page count by probing
     logger.info(f"Chapter {chapter_num} found, probing pages...")
 
-    page = 1
     max_pages = 80  # Safety limit
+    probed: dict[int, bool] = {1: True}  # page -> exists (page 1 checked above)
+
+    async def page_exists(p: int) -> bool:
+        if p not in probed:
+            async with STEALTH_LIMITER:
+                try:
+                    async with session.head(build_image_url(chapter_num, p), headers=headers, allow_redirects=False) as resp:
+                        probed[p] = resp.status == 200
+                except Exception:
+                    probed[p] = False
+        return probed[p]
+
+    # Double until a page is missing, then binary-search the last existing one
+    # (lo always exists, hi is missing or past the safety limit)
+    lo, hi = 1, 2
+    while hi <= max_pages and await page_exists(hi):
+        lo, hi = hi, hi * 2
+    hi = min(hi, max_pages + 1)
+
+    while lo + 1 < hi:
+        mid = (lo + hi) // 2
+        if await page_exists(mid):
+            lo = mid
+        else:
+            hi = mid
 
-    while page <= max_pages:
-        url = build_image_url(chapter_num, page)
-        async with STEALTH_LIMITER:
-            try:
-                async with session.head(url, headers=headers) as resp:
-                    if resp.status == 200:
-                        page += 1
-                    else:
-                        break
-            except:
-                break
-
-    page_count = page - 1
-    if page_count == 0:
-        logger.error(f"Chapter {chapter_num}: no pages found")
-        return None, 0
+    page_count = lo
 
     logger.info(f"Chapter {chapter_num}: {page_count} pages")
 
     # Download all pages
     chapter_temp = temp_dir / f"ch{chapter_num}_en"
     chapter_temp.mkdir(parents=True, exist_ok=True)
+    # Pages left by an earlier run (one readdir instead of a stat per page)
+    existing = set(os.listdir(chapter_temp))
 
-    downloaded_files = []
     referer = BASE_URL
+    sem = asyncio.Semaphore(PAGE_CONCURRENCY)
+    urls = [build_image_url(chapter_num, p) for p in range(1, page_count + 1)]
 
-    for p in range(1, page_count + 1):
-        url = build_image_url(chapter_num, p)
+    async def download_page(p: int) -> Optional[Path]:
+        url = urls[p - 1]
         page_file = chapter_temp / f"{p:03d}.png"
 
-        if page_file.exists():
-            downloaded_files.append(page_file)
-            continue
+        if page_file.name in existing:
+            return page_file
 
-        if p % 10 == 1:
-            logger.info(f"  Downloading pages {p}-{min(p+9, page_count)}/{page_count}")
+        async with sem:
+            if p % 10 == 1:
+                logger.info(f"  Downloading pages {p}-{min(p+9, page_count)}/{page_count}")
+            ok = await download_image(session, url, page_file, referer)
+            await page_delay()
 
-        if await download_image(session, url, page_file, referer):
-            downloaded_files.append(page_file)
-        else:
+        if not ok:
             logger.error(f"  Failed page {p}")
+            return None
+        return page_file
 
-        await page_delay()
+    # A few pages at a time; STEALTH_LIMITER still paces each request
+    results = await asyncio.gather(*(download_page(p) for p in range(1, page_count + 1)))
+    downloaded_files = [f for f in results if f is not None]
 
     if not downloaded_files:
         logger.error(f"No pages downloaded for chapter {chapter_num}")
         return None, 0
 
-    # Create ZIP
-    output_dir.mkdir(parents=True, exist_ok=True)
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for page_file in sorted(downloaded_files):
-            zf.write(page_file, page_file.name)
+    # Create ZIP off the event loop (output_dir is created by the caller)
+    await asyncio.to_thread(build_zip, zip_path, downloaded_files)
 
     logger.info(f"Created {zip_name} ({len(downloaded_files)} pages)")
     return zip_path, len(downloaded_files)
@@ -195,7 +227,7 @@ async def download_spanish_from_mangadex(
     # Get chapters (Spanish only - es-la will be normalized to es)
     await human_delay()
     logger.info("Fetching Spanish chapters...")
-    all_chapters = await get_all_manga_chapters(session, manga_id, languages=["es-la", "es"])
+    all_chapters = await get_all_manga_chapters(session, manga_id, languages=["es-la", "es"], cache=API_CACHE)
 
     # Filter by language (already normalized to "es")
     es_chapters = [ch for ch in all_chapters if ch.language == "es"]
@@ -222,7 +254,7 @@ async def download_spanish_from_mangadex(
         logger.info(f"After range filter: {len(es_chapters)} chapters")
 
     # Sort by chapter number
-    es_chapters.sort(key=lambda x: float(x.chapter_number) if x.chapter_number.replace('.', '').isdigit() else 0)
+    es_chapters.sort(key=lambda x: chapter_sort_key(x.chapter_number))
 
     # Setup directories
     chapters_output = OUTPUT_DIR / "chapters" / MANGA_SLUG
@@ -239,12 +271,14 @@ async def download_spanish_from_mangadex(
 
     # Download chapters
     downloaded = 0
+    done_keys = get_downloaded_keys(db_manga.id) if db_manga else set()
+    rows = []  # pending DB records, written in batches
     for idx, chapter in enumerate(es_chapters, 1):
         ch_num = chapter.chapter_number
         logger.info(f"\n--- Chapter {ch_num} ES ({idx}/{len(es_chapters)}) ---")
 
         # Check if already downloaded
-        if db_manga and is_chapter_downloaded(db_manga.id, ch_num, "es"):
+        if (ch_num, "es") in done_keys:
             logger.info("Already downloaded, skipping")
             continue
 
@@ -257,22 +291,22 @@ async def download_spanish_from_mangadex(
         )
 
         if zip_path and db_manga:
-            add_downloaded_chapter(
-                manga_id=db_manga.id,
-                chapter_number=ch_num,
-                language="es",
-                zip_path=str(zip_path),
-                page_count=chapter.page_count
-            )
+            rows.append((ch_num, "es", str(zip_path), chapter.page_count))
             downloaded += 1
+            if len(rows) >= DB_BATCH_SIZE:
+                add_downloaded_chapters(db_manga.id, rows)
+                rows = []
 
         await chapter_delay()
 
-        # Random longer break
+        # Random longer break (delays the next request, not this loop)
         if random.random() < 0.15:
             pause = random.uniform(15, 45)
             logger.info(f"Taking a break... ({pause:.0f}s)")
-            await asyncio.sleep(pause)
+            STEALTH_LIMITER.long_pause(pause)
+
+    if rows:
+        add_downloaded_chapters(db_manga.id, rows)
 
     logger.info(f"\nSpanish: downloaded {downloaded} new chapters")
     return downloaded
@@ -303,11 +337,9 @@ async def download_english_from_cotn(
     all_chapters = [str(i) for i in range(start_chapter, end_chapter + 1)]
     logger.info(f"Will check chapters {start_chapter}-{end_chapter}")
 
-    # Filter out already downloaded
-    chapters_to_dl = []
-    for ch in all_chapters:
-        if not is_chapter_downloaded(db_manga.id, ch, "en"):
-            chapters_to_dl.append(ch)
+    # Filter out already downloaded (one query for the whole manga)
+    done_keys = get_downloaded_keys(db_manga.id)
+    chapters_to_dl = [ch for ch in all_chapters if (ch, "en") not in done_keys]
 
     logger.info(f"Already downloaded: {len(all_chapters) - len(chapters_to_dl)}")
     logger.info(f"Chapters to download: {len(chapters_to_dl)}")
@@ -316,8 +348,12 @@ async def download_english_from_cotn(
     chapters_output = OUTPUT_DIR / "chapters" / MANGA_SLUG
     chapters_output.mkdir(parents=True, exist_ok=True)
 
+    # Snapshot existing archives once instead of a stat per chapter
+    existing_zips = frozenset(os.listdir(chapters_output))
+
     # Download chapters
     downloaded = 0
+    rows = []  # pending DB records, written in batches
     for idx, ch_num in enumerate(chapters_to_dl, 1):
         logger.info(f"\n--- Chapter {ch_num} EN ({idx}/{len(chapters_to_dl)}) ---")
 
@@ -326,26 +362,27 @@ async def download_english_from_cotn(
             session,
             ch_num,
             chapters_output,
-            TEMP_DIR / MANGA_SLUG
+            TEMP_DIR / MANGA_SLUG,
+            existing_zips
         )
 
         if zip_path and db_manga:
-            add_downloaded_chapter(
-                manga_id=db_manga.id,
-                chapter_number=ch_num,
-                language="en",
-                zip_path=str(zip_path),
-                page_count=page_count
-            )
+            rows.append((ch_num, "en", str(zip_path), page_count))
             downloaded += 1
+            if len(rows) >= DB_BATCH_SIZE:
+                add_downloaded_chapters(db_manga.id, rows)
+                rows = []
 
         await chapter_delay()
 
-        # Random longer break
+        # Random longer break (delays the next request, not this loop)
         if random.random() < 0.15:
             pause = random.uniform(15, 45)
             logger.info(f"Taking a break... ({pause:.0f}s)")
-            await asyncio.sleep(pause)
+            STEALTH_LIMITER.long_pause(pause)
+
+    if rows:
+        add_downloaded_chapters(db_manga.id, rows)
 
     logger.info(f"\nEnglish: downloaded {downloaded} new chapters")
     return downloaded
@@ -371,11 +408,17 @@ async def main():
 
     # Setup session
     timeout = aiohttp.ClientTimeout(total=120, connect=30)
-    connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT, limit=2)
+    connector = aiohttp.TCPConnector(
+        ssl=SSL_CONTEXT,
+        limit=8,
+        ttl_dns_cache=300,
+        enable_cleanup_closed=True,
+        keepalive_timeout=75
+    )
 
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-        total_downloaded = 0
+    total_downloaded = 0
 
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
         # Download Spanish from MangaDex
         if not args.english_only:
             try:
@@ -392,11 +435,12 @@ async def main():
                 logger.info(f"\nSwitching source, pausing... ({pause:.0f}s)\n")
                 await asyncio.sleep(pause)
 
-        # Download English from callofthenight.space
-        if not args.spanish_only:
+    # Download English from callofthenight.space (own pooled session for the CDN)
+    if not args.spanish_only:
+        async with create_cotn_session(SSL_CONTEXT) as cotn_session:
             try:
                 count = await download_english_from_cotn(
-                    session, args.start, args.end
+                    cotn_session, args.start, args.end
                 )
                 total_downloaded += count
             except Exception as e:
@@ -2,13 +2,14 @@
 
 import asyncio
 import logging
+import os
 import zipfile
 from pathlib import Path
 from typing import Optional
 
 import aiohttp
-import aiofiles
 
+from async_write import write_all
 from mangadex_client import Chapter, ChapterPages, get_chapter_pages, build_page_url
 from stealth import (
     STEALTH_LIMITER, get_image_headers, get_browser_headers,
@@ -21,6 +22,12 @@ logger = logging.getLogger(__name__)
 MAX_RETRIES = 5
 RETRY_DELAY = 3.0
 
+# Pages of one chapter downloaded in parallel
+PAGE_CONCURRENCY = 3
+
+# Bytes per streamed read when saving images
+CHUNK_SIZE = 64 * 1024
+
 
 async def download_file(
     session: aiohttp.ClientSession,
@@ -54,10 +61,11 @@ async def download_file(
                             continue
                         return False
 
-                    content = await resp.read()
-                    dest.parent.mkdir(parents=True, exist_ok=True)
-                    async with aiofiles.open(dest, "wb") as f:
-                        await f.write(content)
+                    # Stream to a .part file so an interrupted download is never
+                    # mistaken for a finished page (dest.parent is created by the caller)
+                    part = dest.with_name(dest.name + ".part")
+                    await write_all(part, resp.content.iter_chunked(CHUNK_SIZE))
+                    part.replace(dest)
                     return True
 
         except asyncio.TimeoutError:
@@ -72,15 +80,34 @@ async def download_file(
     return False
 
 
+def build_zip(zip_path: Path, files: list[Path], compression: int = zipfile.ZIP_STORED):
+    """Write files (flat names, in the given page order) into a ZIP archive.
+
+    Blocking; call via asyncio.to_thread from async code.
+    Pages are already-compressed images, so they are stored by default.
+    """
+    with zipfile.ZipFile(zip_path, 'w', compression) as zf:
+        for page_file in files:
+            zf.write(page_file, page_file.name)
+
+
+def count_zip_entries(zip_path: Path) -> int:
+    """Number of members in a ZIP archive (blocking)."""
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        return len(zf.namelist())
+
+
 async def download_chapter_to_zip(
     session: aiohttp.ClientSession,
     chapter: Chapter,
     output_dir: Path,
     temp_dir: Path,
-    data_saver: bool = False
+    data_saver: bool = False,
+    pages: Optional[ChapterPages] = None
 ) -> Optional[Path]:
     """Download chapter pages and create a ZIP archive.
 
+    pages: prefetched at-home info (looked up here if not given)
     Returns path to created ZIP file, or None if failed.
     """
     # Create ZIP filename: 001_en.zip
@@ -94,7 +121,8 @@ async def download_chapter_to_zip(
         return zip_path
 
     # Get page URLs
-    pages = await get_chapter_pages(session, chapter.id)
+    if pages is None:
+        pages = await get_chapter_pages(session, chapter.id)
     if not pages:
         logger.error(f"Failed to get pages for chapter {chapter.chapter_number}")
         return None
@@ -102,48 +130,106 @@ async def download_chapter_to_zip(
     # Create temp directory for this chapter
     chapter_temp = temp_dir / f"{ch_num}_{chapter.language}"
     chapter_temp.mkdir(parents=True, exist_ok=True)
+    # Pages left by an earlier run (one readdir instead of a stat per page)
+    existing = set(os.listdir(chapter_temp))
 
-    # Download all pages
+    # Download all pages (a few at a time; STEALTH_LIMITER still paces requests)
     filenames = pages.data_saver if data_saver else pages.data
-    downloaded_files = []
+    # Use chapter page as referer for authenticity
+    referer = f"https://mangadex.org/chapter/{chapter.id}"
+    sem = asyncio.Semaphore(PAGE_CONCURRENCY)
 
-    for idx, filename in enumerate(filenames, 1):
+    async def download_page(idx: int, filename: str) -> Optional[Path]:
         url = build_page_url(pages, filename, data_saver)
         # Normalize page filename: 001.jpg, 002.jpg, etc.
         ext = Path(filename).suffix or ".jpg"
         page_file = chapter_temp / f"{idx:03d}{ext}"
 
-        if page_file.exists():
-            downloaded_files.append(page_file)
-            continue
+        if page_file.name in existing:
+            return page_file
 
-        logger.info(f"Downloading page {idx}/{len(filenames)} for ch.{chapter.chapter_number} ({chapter.language})")
+        async with sem:
+            logger.info(f"Downloading page {idx}/{len(filenames)} for ch.{chapter.chapter_number} ({chapter.language})")
+            ok = await download_file(session, url, page_file, referer=referer)
+            # Random delay between pages (simulates reading)
+            await page_delay()
 
-        # Use chapter page as referer for authenticity
-        referer = f"https://mangadex.org/chapter/{chapter.id}"
-        if await download_file(session, url, page_file, referer=referer):
-            downloaded_files.append(page_file)
-        else:
+        if not ok:
             logger.error(f"Failed to download page {idx}")
             # Continue anyway, might get partial chapter
+            return None
+        return page_file
 
-        # Random delay between pages (simulates reading)
-        await page_delay()
+    results = await asyncio.gather(
+        *(download_page(idx, filename) for idx, filename in enumerate(filenames, 1))
+    )
+    downloaded_files = [f for f in results if f is not None]
 
     if not downloaded_files:
         logger.error(f"No pages downloaded for chapter {chapter.chapter_number}")
         return None
 
-    # Create ZIP archive
+    # Create ZIP archive off the event loop
     output_dir.mkdir(parents=True, exist_ok=True)
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for page_file in sorted(downloaded_files):
-            zf.write(page_file, page_file.name)
+    await asyncio.to_thread(build_zip, zip_path, downloaded_files)
 
     logger.info(f"Created {zip_name} with {len(downloaded_files)} pages")
     return zip_path
 
 
+async def fetch_chapter_pages(
+    session: aiohttp.ClientSession,
+    chapters: dict[str, Chapter]
+) -> dict[str, Optional[ChapterPages]]:
+    """Look up the at-home server for each language version concurrently.
+
+    chapters: {language: Chapter}
+    Returns {language: ChapterPages or None}.
+    """
+    results = await asyncio.gather(
+        *(get_chapter_pages(session, ch.id) for ch in chapters.values()),
+        return_exceptions=True
+    )
+    return {
+        lang: None if isinstance(res, BaseException) else res
+        for lang, res in zip(chapters, results)
+    }
+
+
+async def download_chapter_languages(
+    session: aiohttp.ClientSession,
+    chapters: dict[str, Chapter],
+    output_dir: Path,
+    temp_dir: Path,
+    data_saver: bool = False,
+    pages: Optional[dict[str, Optional[ChapterPages]]] = None
+) -> dict[str, Optional[Path]]:
+    """Download several language versions of a chapter concurrently.
+
+    chapters: {language: Chapter}
+    pages: optional prefetched {language: ChapterPages} (see fetch_chapter_pages)
+    Returns {language: zip_path or None}. Failures are logged, not raised.
+    """
+    pages = pages or {}
+
+    async def download_one(lang: str, chapter: Chapter) -> Optional[Path]:
+        try:
+            return await download_chapter_to_zip(
+                session, chapter, output_dir, temp_dir,
+                data_saver=data_saver, pages=pages.get(lang)
+            )
+        except Exception as e:
+            logger.error(f"Failed {lang.upper()} ch.{chapter.chapter_number}: {e}")
+            return None
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = {
+            lang: tg.create_task(download_one(lang, chapter))
+            for lang, chapter in chapters.items()
+        }
+    return {lang: task.result() for lang, task in tasks.items()}
+
+
 async def download_cover(
     session: aiohttp.ClientSession,
     manga_id: str,
@@ -157,4 +243,5 @@ async def download_cover(
 
     url = f"https://uploads.mangadex.org/covers/{manga_id}/{cover_filename}"
     referer = f"https://mangadex.org/title/{manga_id}"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
     return await download_file(session, url, output_path, referer=referer)
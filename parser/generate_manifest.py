@@ -11,6 +11,7 @@ Usage:
 import argparse
 import json
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Local upload directory (after alignment)
@@ -21,8 +22,8 @@ def count_pages_in_zip(zip_path: Path) -> int:
     """Count image files in a ZIP."""
     try:
         with zipfile.ZipFile(zip_path, 'r') as zf:
-            return sum(1 for name in zf.namelist()
-                      if Path(name).suffix.lower() in {'.jpg', '.jpeg', '.png', '.webp'})
+            return sum(1 for name in zf.NameToInfo
+                      if name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')))
     except Exception:
         return 0
 
@@ -48,24 +49,27 @@ def generate_manifest(manga_slug: str, title: str, output_dir: Path = None) -> d
         except (ValueError, TypeError):
             return float('inf')
 
+    # Collect existing ZIPs, then count their pages in parallel
+    chapter_zips = []
+    for ch_num in sorted(chapter_nums, key=sort_key):
+        for lang in ("en", "es"):
+            zip_path = chapters_dir / f"{ch_num}_{lang}.zip"
+            if zip_path.exists():
+                chapter_zips.append((ch_num, lang, zip_path))
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        page_counts = list(ex.map(count_pages_in_zip, [z[2] for z in chapter_zips]))
+
+    by_chapter: dict[str, dict] = {}
+    for (ch_num, lang, _), page_count in zip(chapter_zips, page_counts):
+        by_chapter.setdefault(ch_num, {})[lang] = {
+            "archive": f"chapters/{manga_slug}/{ch_num}_{lang}.zip",
+            "page_count": page_count
+        }
+
     chapters = []
     for ch_num in sorted(chapter_nums, key=sort_key):
-        en_zip = chapters_dir / f"{ch_num}_en.zip"
-        es_zip = chapters_dir / f"{ch_num}_es.zip"
-
-        languages = {}
-
-        if en_zip.exists():
-            languages["en"] = {
-                "archive": f"chapters/{manga_slug}/{ch_num}_en.zip",
-                "page_count": count_pages_in_zip(en_zip)
-            }
-
-        if es_zip.exists():
-            languages["es"] = {
-                "archive": f"chapters/{manga_slug}/{ch_num}_es.zip",
-                "page_count": count_pages_in_zip(es_zip)
-            }
+        languages = by_chapter.get(ch_num, {})
 
         if languages:
             chapters.append({
@@ -0,0 +1,41 @@
+"""Shared aiohttp session for MangaDex scripts."""
+
+import ssl
+from typing import Optional
+
+import aiohttp
+import certifi
+
+# SSL context using certifi certificates
+SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get the process-wide session, creating it on first use.
+
+    One session means one connection pool, so keep-alive TLS connections to
+    api.mangadex.org and the @Home CDN are reused across the whole run.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            ssl=SSL_CONTEXT,
+            limit=8,
+            limit_per_host=4,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True,
+            keepalive_timeout=75
+        )
+        timeout = aiohttp.ClientTimeout(total=120, connect=30)
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+
+async def close_session():
+    """Close the shared session (call once before the event loop exits)."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
@@ -3,24 +3,22 @@
 
 import asyncio
 import logging
-import ssl
 from pathlib import Path
 from typing import Optional
 
 import aiohttp
-import certifi
 
 from database import (
-    init_database, add_manga, add_downloaded_chapter,
-    get_manga_by_mangadex_id, extract_mangadex_id, get_all_manga, get_download_stats
+    init_database, add_manga, add_downloaded_chapters, update_manga_chapter_counts,
+    update_manga_status, get_manga_by_mangadex_id, extract_mangadex_id, get_all_manga,
+    get_download_stats, transaction
 )
-from mangadex_client import RATE_LIMITER, BASE_URL
+from mangadex_client import RATE_LIMITER, BASE_URL, json_loads
+from http_session import get_session, close_session
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
-SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
-
 # Wishlist manga URLs
 WISHLIST = [
     "https://mangadex.org/title/d90ea6cb-7bc3-4d80-8af0-28557e6c4e17/delicious-in-dungeon",
@@ -62,7 +60,7 @@ async def fetch_manga_info(session: aiohttp.ClientSession, manga_id: str) -> Opt
             if resp.status != 200:
                 logger.error(f"Failed to fetch manga {manga_id}: {resp.status}")
                 return None
-            data = await resp.json()
+            data = await resp.json(loads=json_loads)
             return data["data"]
 
 
@@ -77,48 +75,66 @@ async def count_chapters(session: aiohttp.ClientSession, manga_id: str, language
         async with session.get(f"{BASE_URL}/chapter", params=params) as resp:
             if resp.status != 200:
                 return 0
-            data = await resp.json()
+            data = await resp.json(loads=json_loads)
             return data.get("total", 0)
 
 
-async def init_wishlist():
-    """Initialize database with wishlist manga."""
-    init_database()
+async def process_one(
+    session: aiohttp.ClientSession,
+    url: str
+) -> Optional[tuple[str, str, int, int]]:
+    """Fetch title and EN/ES chapter counts for one wishlist URL.
 
-    connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT)
-    async with aiohttp.ClientSession(connector=connector) as session:
-        for url in WISHLIST:
-            manga_id = extract_mangadex_id(url)
-            logger.info(f"Processing: {url}")
+    Returns (manga_id, title, total_en, total_es) or None on failure.
+    """
+    manga_id = extract_mangadex_id(url)
+    logger.info(f"Processing: {url}")
 
-            # Fetch manga info
-            manga_data = await fetch_manga_info(session, manga_id)
-            if not manga_data:
-                logger.error(f"Skipping {url}")
-                continue
+    # Fetch manga info and count chapters concurrently (RATE_LIMITER paces them)
+    manga_data, total_en, total_es = await asyncio.gather(
+        fetch_manga_info(session, manga_id),
+        count_chapters(session, manga_id, "en"),
+        count_chapters(session, manga_id, "es")
+    )
+    if not manga_data:
+        logger.error(f"Skipping {url}")
+        return None
 
-            # Get title (prefer English)
-            attrs = manga_data["attributes"]
-            title = attrs["title"].get("en") or attrs["title"].get("ja-ro") or list(attrs["title"].values())[0]
+    # Get title (prefer English)
+    attrs = manga_data["attributes"]
+    title = attrs["title"].get("en") or attrs["title"].get("ja-ro") or list(attrs["title"].values())[0]
 
-            # Count chapters
-            total_en = await count_chapters(session, manga_id, "en")
-            total_es = await count_chapters(session, manga_id, "es")
+    logger.info(f"  Title: {title}")
+    logger.info(f"  Chapters: EN={total_en}, ES={total_es}")
+    return manga_id, title, total_en, total_es
 
-            logger.info(f"  Title: {title}")
-            logger.info(f"  Chapters: EN={total_en}, ES={total_es}")
 
-            # Add to database
-            add_manga(manga_id, title, url)
+async def init_wishlist(session: Optional[aiohttp.ClientSession] = None):
+    """Initialize database with wishlist manga.
+
+    session: defaults to the shared pooled session (http_session.get_session)
+    """
+    init_database()
 
-            # Update chapter counts
-            from database import update_manga_chapter_counts, get_manga_by_mangadex_id
-            manga_record = get_manga_by_mangadex_id(manga_id)
-            if manga_record:
-                update_manga_chapter_counts(manga_record.id, total_en, total_es)
+    if session is None:
+        session = await get_session()
+    results = await asyncio.gather(
+        *(process_one(session, url) for url in WISHLIST),
+        return_exceptions=True
+    )
+
+    # Write everything in one transaction
+    with transaction():
+        for url, result in zip(WISHLIST, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Skipping {url}: {result}")
+                continue
+            if result is None:
+                continue
 
-            # Small delay
-            await asyncio.sleep(0.5)
+            manga_id, title, total_en, total_es = result
+            db_id = add_manga(manga_id, title, url)
+            update_manga_chapter_counts(db_id, total_en, total_es)
 
     logger.info("\n=== Wishlist initialized ===")
     print_stats()
@@ -126,8 +142,6 @@ async def init_wishlist():
 
 def add_chainsaw_man_chapters():
     """Add already downloaded Chainsaw Man chapters to database."""
-    from database import get_manga_by_mangadex_id, add_downloaded_chapter, update_manga_status
-
     chainsaw_id = "a77742b1-befd-49a4-bff5-1ad4e6b0ef7b"
     manga = get_manga_by_mangadex_id(chainsaw_id)
 
@@ -142,6 +156,7 @@ def add_chainsaw_man_chapters():
         return
 
     # Scan existing zip files
+    rows = []
     for zip_file in sorted(chapters_dir.glob("*.zip")):
         # Parse filename: 001_en.zip
         parts = zip_file.stem.split("_")
@@ -151,15 +166,11 @@ def add_chainsaw_man_chapters():
         chapter_num = parts[0].lstrip("0") or "0"
         language = parts[1]
 
-        add_downloaded_chapter(
-            manga_id=manga.id,
-            chapter_number=chapter_num,
-            language=language,
-            zip_path=str(zip_file),
-            page_count=0  # Could extract from zip if needed
-        )
+        # page_count=0: could extract from zip if needed
+        rows.append((chapter_num, language, str(zip_file), 0))
         logger.info(f"Added: Chapter {chapter_num} ({language})")
 
+    add_downloaded_chapters(manga.id, rows)
     update_manga_status(manga.id, "downloading")
     logger.info("Chainsaw Man chapters recorded!")
 
@@ -191,6 +202,15 @@ def print_stats():
         print(f"{title:<40} {m.status:<12} {en:<8} {es:<8} {dl:<6}")
 
 
+async def main():
+    # Shared session (connection pool reused for the whole run)
+    session = await get_session()
+    try:
+        await init_wishlist(session)
+    finally:
+        await close_session()
+
+
 if __name__ == "__main__":
     import sys
 
@@ -200,5 +220,5 @@ if __name__ == "__main__":
     elif len(sys.argv) > 1 and sys.argv[1] == "--stats":
         print_stats()
     else:
-        asyncio.run(init_wishlist())
+        asyncio.run(main())
         add_chainsaw_man_chapters()
@@ -3,23 +3,24 @@
 
 import asyncio
 import argparse
+import json
 import logging
-import ssl
 from pathlib import Path
 
-import aiohttp
-import certifi
-
 from mangadex_client import (
-    get_manga_by_title, get_all_manga_chapters, get_manga_cover, Chapter
+    get_manga_by_title, get_all_manga_chapters, get_manga_cover,
+    scan_chapters, ResponseCache
 )
 from downloader import download_chapter_to_zip, download_cover
-from manifest import generate_manifest, save_manifest
+from manifest import generate_manifest, save_manifest, manifest_is_fresh
 from stealth import chapter_delay, human_delay
+from util import chapter_sort_key, make_slug
+from http_session import get_session, close_session
 from database import (
-    init_database, add_manga, add_downloaded_chapter,
+    init_database, add_manga, add_downloaded_chapters,
     get_manga_by_mangadex_id, update_manga_chapter_counts,
-    update_manga_status, is_chapter_downloaded
+    update_manga_status, get_downloaded_keys,
+    a_get_cached_response, a_save_cached_response
 )
 
 logging.basicConfig(
@@ -28,38 +29,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# SSL context using certifi certificates
-SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+# Chapter list pages are cached by ETag in the tracker database
+API_CACHE = ResponseCache(a_get_cached_response, a_save_cached_response)
 
 # Default output directory
 DEFAULT_OUTPUT = Path("./output")
 DEFAULT_TEMP = Path("./temp")
 
+# Chapters downloaded at once (STEALTH_LIMITER still paces every request)
+CHAPTER_CONCURRENCY = 4
 
-def filter_bilingual_chapters(chapters: list[Chapter]) -> dict[str, dict[str, Chapter]]:
-    """Group chapters by number and filter to only those with both EN and ES.
-
-    Returns dict: {chapter_number: {"en": Chapter, "es": Chapter}}
-    """
-    # Group by chapter number
-    by_number: dict[str, dict[str, Chapter]] = {}
-
-    for ch in chapters:
-        num = ch.chapter_number
-        if num not in by_number:
-            by_number[num] = {}
-
-        # Keep the first (or best) version for each language
-        if ch.language not in by_number[num]:
-            by_number[num][ch.language] = ch
-
-    # Filter to only bilingual chapters
-    bilingual = {
-        num: langs for num, langs in by_number.items()
-        if "en" in langs and "es" in langs
-    }
-
-    return bilingual
+# Downloaded chapters recorded per DB transaction
+DB_BATCH_SIZE = 16
 
 
 async def download_manga(
@@ -74,8 +55,9 @@ async def download_manga(
     # Initialize database
     init_database()
 
-    connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT)
-    async with aiohttp.ClientSession(connector=connector) as session:
+    # Shared session: tuned keep-alive pool and DNS cache (see http_session)
+    session = await get_session()
+    try:
         # Find manga
         logger.info(f"Searching for: {manga_title}")
         manga = await get_manga_by_title(session, manga_title)
@@ -86,7 +68,7 @@ async def download_manga(
 
         manga_id = manga["id"]
         title = manga["attributes"]["title"].get("en", manga_title)
-        manga_slug = title.lower().replace(" ", "-")
+        manga_slug = make_slug(title)
 
         # Add/update manga in database
         mangadex_url = f"https://mangadex.org/title/{manga_id}"
@@ -95,18 +77,19 @@ async def download_manga(
 
         logger.info(f"Found: {title} ({manga_id})")
 
-        # Get all chapters
+        # Get all chapters (cover filename is looked up alongside)
         logger.info("Fetching chapter list...")
-        all_chapters = await get_all_manga_chapters(session, manga_id)
+        all_chapters, cover_filename = await asyncio.gather(
+            get_all_manga_chapters(session, manga_id, cache=API_CACHE),
+            get_manga_cover(session, manga_id)
+        )
         logger.info(f"Total chapters found: {len(all_chapters)}")
 
-        # Filter to bilingual only
-        bilingual = filter_bilingual_chapters(all_chapters)
+        # Count per language and filter to bilingual only (one pass)
+        en_count, es_count, bilingual = scan_chapters(all_chapters)
         logger.info(f"Bilingual chapters (EN+ES): {len(bilingual)}")
 
-        # Count total chapters per language and update database
-        en_count = len([c for c in all_chapters if c.language == "en"])
-        es_count = len([c for c in all_chapters if c.language == "es"])
+        # Update database
         if db_manga:
             update_manga_chapter_counts(db_manga.id, en_count, es_count)
 
@@ -119,89 +102,120 @@ async def download_manga(
             start, end = chapter_range
             bilingual = {
                 num: langs for num, langs in bilingual.items()
-                if start <= float(num) <= end
+                if start <= chapter_sort_key(num) <= end
             }
             logger.info(f"After range filter ({start}-{end}): {len(bilingual)} chapters")
 
         # Create output directories
         chapters_output = output_dir / "chapters" / manga_slug
         covers_output = output_dir / "covers" / manga_slug
+        temp_output = temp_dir / manga_slug
+        cover_rel = f"covers/{manga_slug}/cover.jpg"
         chapters_output.mkdir(parents=True, exist_ok=True)
         covers_output.mkdir(parents=True, exist_ok=True)
 
-        # Download cover
-        logger.info("Downloading cover...")
-        cover_filename = await get_manga_cover(session, manga_id)
+        # Download cover in the background while chapters download
+        cover_task = None
         if cover_filename:
+            logger.info("Downloading cover...")
             cover_path = covers_output / "cover.jpg"
-            await download_cover(session, manga_id, cover_filename, cover_path)
+            cover_task = asyncio.create_task(
+                download_cover(session, manga_id, cover_filename, cover_path)
+            )
 
-        # Download chapters
-        downloaded_count = 0
-        for ch_num in sorted(bilingual.keys(), key=lambda x: float(x) if x.replace('.', '').isdigit() else 0):
+        # Already-downloaded (chapter, language) pairs, fetched once
+        done_keys = get_downloaded_keys(db_manga.id) if db_manga else set()
+        pending_rows = []
+
+        # Download chapters, a few at a time
+        sem = asyncio.Semaphore(CHAPTER_CONCURRENCY)
+
+        async def download_one_chapter(ch_num: str) -> int:
             langs = bilingual[ch_num]
-            logger.info(f"\n=== Chapter {ch_num} ===")
-
-            for lang in ["en", "es"]:
-                chapter = langs[lang]
-
-                # Check if already downloaded in database
-                if db_manga and is_chapter_downloaded(db_manga.id, ch_num, lang):
-                    logger.info(f"Skipping {lang.upper()} (already in database)")
-                    continue
-
-                logger.info(f"Processing {lang.upper()}...")
-
-                zip_path = await download_chapter_to_zip(
-                    session,
-                    chapter,
-                    chapters_output,
-                    temp_dir / manga_slug,
-                    data_saver=data_saver
-                )
-
-                # Record download in database
-                if zip_path and db_manga:
-                    add_downloaded_chapter(
-                        manga_id=db_manga.id,
-                        chapter_number=ch_num,
-                        language=lang,
-                        zip_path=str(zip_path),
-                        page_count=chapter.page_count
+            count = 0
+            async with sem:
+                logger.info(f"\n=== Chapter {ch_num} ===")
+
+                for lang in ["en", "es"]:
+                    chapter = langs[lang]
+
+                    # Check if already downloaded in database
+                    if (ch_num, lang) in done_keys:
+                        logger.info(f"Skipping {lang.upper()} (already in database)")
+                        continue
+
+                    logger.info(f"Processing {lang.upper()}...")
+
+                    zip_path = await download_chapter_to_zip(
+                        session,
+                        chapter,
+                        chapters_output,
+                        temp_output,
+                        data_saver=data_saver
                     )
-                    downloaded_count += 1
-
-                # Random delay between chapters (stealth)
-                await chapter_delay()
-
-        # Generate manifest
-        logger.info("\nGenerating manifest...")
-        manifest = generate_manifest(
-            manga_slug,
-            title,
-            chapters_output,
-            f"covers/{manga_slug}/cover.jpg"
+
+                    # Record download in database (after the ZIP is written)
+                    if zip_path and db_manga:
+                        pending_rows.append((ch_num, lang, str(zip_path), chapter.page_count))
+                        done_keys.add((ch_num, lang))
+                        count += 1
+                        if len(pending_rows) >= DB_BATCH_SIZE:
+                            add_downloaded_chapters(db_manga.id, pending_rows[:])
+                            pending_rows.clear()
+
+                    # Random delay between chapters (stealth)
+                    await chapter_delay()
+            return count
+
+        chapter_nums = list(bilingual)
+        results = await asyncio.gather(
+            *(download_one_chapter(ch_num) for ch_num in chapter_nums),
+            return_exceptions=True
         )
 
+        downloaded_count = 0
+        for ch_num, result in zip(chapter_nums, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Chapter {ch_num} failed: {result}")
+            else:
+                downloaded_count += result
+
+        # Record any remaining downloads
+        if db_manga:
+            add_downloaded_chapters(db_manga.id, pending_rows)
+
+        if cover_task:
+            await cover_task
+
+        # Generate manifest (skipped if nothing changed since the last one)
         manifest_path = output_dir / manga_slug / "manifest.json"
-        save_manifest(manifest, manifest_path)
-        logger.info(f"Manifest saved: {manifest_path}")
+        if downloaded_count == 0 and manifest_is_fresh(manifest_path, chapters_output):
+            logger.info(f"\nManifest up to date: {manifest_path}")
+            manifest_chapters = len(json.loads(manifest_path.read_bytes())["chapters"])
+        else:
+            logger.info("\nGenerating manifest...")
+            manifest = generate_manifest(
+                manga_slug,
+                title,
+                chapters_output,
+                cover_rel
+            )
+            save_manifest(manifest, manifest_path)
+            logger.info(f"Manifest saved: {manifest_path}")
+            manifest_chapters = len(manifest.chapters)
 
         # Update manga status in database
         if db_manga:
-            # Check if all bilingual chapters downloaded
-            from database import get_downloaded_chapters
-            dl_chapters = get_downloaded_chapters(db_manga.id)
-            unique_bilingual = set()
-            for dc in dl_chapters:
-                unique_bilingual.add(dc["chapter_number"])
-
-            if len(unique_bilingual) >= len(bilingual):
+            # Complete once every bilingual chapter has both languages recorded
+            completed = sum(1 for n in bilingual if (n, "en") in done_keys and (n, "es") in done_keys)
+            if completed >= len(bilingual):
                 update_manga_status(db_manga.id, "completed")
                 logger.info("Manga marked as completed in database")
 
         logger.info(f"\nDone! Downloaded {downloaded_count} new chapters")
-        logger.info(f"Total bilingual chapters available: {len(manifest.chapters)}")
+        logger.info(f"Total bilingual chapters available: {manifest_chapters}")
+    finally:
+        await close_session()
 
 
 def main():
@@ -1,13 +1,22 @@
 """MangaDex API client with rate limiting and stealth."""
 
 import asyncio
+import json
 import logging
-from typing import Optional
+import math
+from collections import defaultdict
+from typing import Awaitable, Callable, Optional
 from dataclasses import dataclass
 
 import aiohttp
 
-from stealth import STEALTH_LIMITER, get_api_headers, human_delay
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to stdlib json
+    orjson = None
+
+from stealth import STEALTH_LIMITER, get_api_headers
+from util import chapter_sort_key
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +25,9 @@ BASE_URL = "https://api.mangadex.org"
 # Legacy alias for compatibility
 RATE_LIMITER = STEALTH_LIMITER
 
+# JSON decoder for API responses (orjson if available)
+json_loads = orjson.loads if orjson is not None else json.loads
+
 # Language normalization (treat regional variants as main language)
 LANGUAGE_ALIASES = {
     "es-la": "es",  # Latin America Spanish -> Spanish
@@ -28,7 +40,7 @@ def normalize_language(lang: str) -> str:
     return LANGUAGE_ALIASES.get(lang, lang)
 
 
-@dataclass
+@dataclass(slots=True)
 class Chapter:
     """Chapter metadata."""
     id: str
@@ -39,6 +51,17 @@ class Chapter:
     volume: Optional[str] = None
 
 
+@dataclass
+class ResponseCache:
+    """Async hooks for caching API responses by ETag.
+
+    get(key) -> (etag, body) or None; save(key, etag, body). Callers pass the
+    database.a_get_cached_response / a_save_cached_response pair.
+    """
+    get: Callable[[str], Awaitable[Optional[tuple[str, str]]]]
+    save: Callable[[str, str, str], Awaitable[None]]
+
+
 @dataclass
 class ChapterPages:
     """Chapter pages data from at-home endpoint."""
@@ -57,7 +80,7 @@ async def get_manga_by_title(session: aiohttp.ClientSession, title: str) -> Opti
             if resp.status != 200:
                 logger.error(f"Failed to search manga: {resp.status}")
                 return None
-            data = await resp.json()
+            data = await resp.json(loads=json_loads)
             if data["data"]:
                 return data["data"][0]
             return None
@@ -68,13 +91,22 @@ async def get_manga_chapters(
     manga_id: str,
     languages: list[str] = None,
     limit: int = 100,
-    offset: int = 0
-) -> list[Chapter]:
-    """Get chapters for a manga with pagination."""
+    offset: int = 0,
+    cache: Optional[ResponseCache] = None
+) -> tuple[list[Chapter], int]:
+    """Get one page of chapters for a manga, plus the API's total chapter count.
+
+    With a cache, the request is conditional (If-None-Match) and a 304 reuses
+    the cached page.
+    """
     if languages is None:
         # Include regional variants
         languages = ["en", "es", "es-la"]
 
+    # Reuse the cached page when the API answers 304 Not Modified
+    cache_key = f"chapters:{manga_id}:{','.join(languages)}:{limit}:{offset}"
+    cached = await cache.get(cache_key) if cache else None
+
     chapters = []
     async with STEALTH_LIMITER:
         params = {
@@ -82,61 +114,99 @@ async def get_manga_chapters(
             "translatedLanguage[]": languages,
             "limit": limit,
             "offset": offset,
-            "order[chapter]": "asc",
-            "includes[]": ["scanlation_group"]
+            "order[chapter]": "asc"
         }
         headers = get_api_headers()
+        if cached:
+            headers["If-None-Match"] = cached[0]
         async with session.get(f"{BASE_URL}/chapter", params=params, headers=headers) as resp:
-            if resp.status != 200:
+            if resp.status == 304 and cached:
+                data = json_loads(cached[1])
+            elif resp.status != 200:
                 logger.error(f"Failed to get chapters: {resp.status}")
-                return chapters
-
-            data = await resp.json()
-            for ch in data["data"]:
-                attrs = ch["attributes"]
-                raw_lang = attrs["translatedLanguage"]
-                # Normalize language (es-la -> es)
-                normalized_lang = normalize_language(raw_lang)
-                chapters.append(Chapter(
-                    id=ch["id"],
-                    chapter_number=attrs.get("chapter") or "0",
-                    title=attrs.get("title") or "",
-                    language=normalized_lang,
-                    page_count=attrs.get("pages", 0),
-                    volume=attrs.get("volume")
-                ))
-
-    return chapters
+                return chapters, 0
+            else:
+                data = await resp.json(loads=json_loads)
+                etag = resp.headers.get("ETag")
+                if etag and cache:
+                    await cache.save(cache_key, etag, json.dumps(data))
+
+    total = data.get("total", 0)
+    for ch in data["data"]:
+        attrs = ch["attributes"]
+        raw_lang = attrs["translatedLanguage"]
+        # Normalize language (es-la -> es)
+        normalized_lang = normalize_language(raw_lang)
+        chapters.append(Chapter(
+            id=ch["id"],
+            chapter_number=attrs.get("chapter") or "0",
+            title=attrs.get("title") or "",
+            language=normalized_lang,
+            page_count=attrs.get("pages", 0),
+            volume=attrs.get("volume")
+        ))
+
+    return chapters, total
 
 
 async def get_all_manga_chapters(
     session: aiohttp.ClientSession,
     manga_id: str,
-    languages: list[str] = None
+    languages: list[str] = None,
+    cache: Optional[ResponseCache] = None
 ) -> list[Chapter]:
     """Get all chapters for a manga with auto-pagination."""
     if languages is None:
         languages = ["en", "es", "es-la"]
 
-    all_chapters = []
-    offset = 0
     limit = 100
 
-    while True:
-        chapters = await get_manga_chapters(
-            session, manga_id, languages, limit, offset
-        )
-        if not chapters:
-            break
+    # First page tells us how many chapters there are in total
+    all_chapters, total = await get_manga_chapters(
+        session, manga_id, languages, limit, 0, cache
+    )
+    pages = math.ceil(total / limit)
+    if pages <= 1:
+        return all_chapters
+
+    # Fetch the remaining pages together (STEALTH_LIMITER still paces them)
+    results = await asyncio.gather(*(
+        get_manga_chapters(session, manga_id, languages, limit, i * limit, cache)
+        for i in range(1, pages)
+    ))
+    for chapters, _ in results:
         all_chapters.extend(chapters)
-        if len(chapters) < limit:
-            break
-        offset += limit
-        await human_delay()  # Random delay between pagination
 
     return all_chapters
 
 
+def scan_chapters(
+    chapters: list[Chapter]
+) -> tuple[int, int, dict[str, dict[str, Chapter]]]:
+    """Count EN/ES chapters and group bilingual ones in a single pass.
+
+    Returns (en_count, es_count, {chapter_number: {"en": Chapter, "es": Chapter}}),
+    with the bilingual dict already in chapter order.
+    """
+    en_count = es_count = 0
+    by_number: dict[str, dict[str, Chapter]] = defaultdict(dict)
+
+    for ch in chapters:
+        lang = ch.language
+        if lang == "en":
+            en_count += 1
+        elif lang == "es":
+            es_count += 1
+        # Keep the first version for each language
+        by_number[ch.chapter_number].setdefault(lang, ch)
+
+    bilingual = {
+        num: by_number[num] for num in sorted(by_number, key=chapter_sort_key)
+        if {"en", "es"} <= by_number[num].keys()
+    }
+    return en_count, es_count, bilingual
+
+
 async def get_chapter_pages(
     session: aiohttp.ClientSession,
     chapter_id: str
@@ -149,7 +219,7 @@ async def get_chapter_pages(
                 logger.error(f"Failed to get chapter pages: {resp.status}")
                 return None
 
-            data = await resp.json()
+            data = await resp.json(loads=json_loads)
             ch = data["chapter"]
             return ChapterPages(
                 base_url=data["baseUrl"],
@@ -176,7 +246,7 @@ async def get_manga_cover(
         async with session.get(f"{BASE_URL}/cover", params=params, headers=headers) as resp:
             if resp.status != 200:
                 return None
-            data = await resp.json()
+            data = await resp.json(loads=json_loads)
             if data["data"]:
                 return data["data"][0]["attributes"]["fileName"]
             return None
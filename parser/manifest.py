@@ -1,11 +1,18 @@
 """Manifest generation for manga data."""
 
 import json
+import re
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dataclasses import dataclass, field, asdict
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to stdlib json
+    orjson = None
+
 
 @dataclass
 class LanguageInfo:
@@ -38,15 +45,21 @@ class Manifest:
     chapters: list[ChapterManifest] = field(default_factory=list)
 
 
+# ZIPs opened at once when counting pages
+COUNT_WORKERS = 8
+
+# Chapter ZIP names like 001_en.zip / 001_es.zip
+_NAME_RE = re.compile(r'^(.+)_(en|es)$')
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+
 def count_pages_in_zip(zip_path: Path) -> int:
     """Count image files in a ZIP archive."""
     try:
         with zipfile.ZipFile(zip_path, 'r') as zf:
-            image_exts = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
-            return sum(
-                1 for name in zf.namelist()
-                if Path(name).suffix.lower() in image_exts
-            )
+            # NameToInfo is built when the central directory is read
+            return sum(1 for name in zf.NameToInfo if name.lower().endswith(IMAGE_EXTS))
     except Exception:
         return 0
 
@@ -77,18 +90,12 @@ def generate_manifest(
 
     for zip_file in chapters_dir.glob("*.zip"):
         # Parse filename: 001_en.zip -> number=001, lang=en
-        stem = zip_file.stem
-        if "_" not in stem:
-            continue
-
-        parts = stem.rsplit("_", 1)
-        if len(parts) != 2:
+        m = _NAME_RE.match(zip_file.stem)
+        if not m:
             continue
 
-        ch_num, lang = parts
-        if ch_num not in chapter_files:
-            chapter_files[ch_num] = {}
-        chapter_files[ch_num][lang] = zip_file
+        ch_num, lang = m.group(1), m.group(2)
+        chapter_files.setdefault(ch_num, {})[lang] = zip_file
 
     # Build chapters list - only include if both EN and ES exist
     def _chapter_sort_key(ch):
@@ -97,12 +104,21 @@ def generate_manifest(
         except (ValueError, TypeError):
             return float('inf')
 
-    for ch_num in sorted(chapter_files.keys(), key=_chapter_sort_key):
-        langs = chapter_files[ch_num]
+    bilingual_nums = [
+        ch_num for ch_num in sorted(chapter_files.keys(), key=_chapter_sort_key)
+        if "en" in chapter_files[ch_num] and "es" in chapter_files[ch_num]
+    ]
 
-        # Skip if missing either language
-        if "en" not in langs or "es" not in langs:
-            continue
+    # Count pages in all ZIPs in parallel
+    zip_paths = [
+        zip_path for ch_num in bilingual_nums
+        for zip_path in chapter_files[ch_num].values()
+    ]
+    with ThreadPoolExecutor(max_workers=COUNT_WORKERS) as ex:
+        page_counts = dict(zip(zip_paths, ex.map(count_pages_in_zip, zip_paths)))
+
+    for ch_num in bilingual_nums:
+        langs = chapter_files[ch_num]
 
         chapter = ChapterManifest(
             number=ch_num.lstrip("0") or "0",
@@ -111,10 +127,9 @@ def generate_manifest(
         )
 
         for lang, zip_path in langs.items():
-            page_count = count_pages_in_zip(zip_path)
             chapter.languages[lang] = LanguageInfo(
                 archive=f"chapters/{manga_id}/{zip_path.name}",
-                page_count=page_count
+                page_count=page_counts[zip_path]
             )
 
         manifest.chapters.append(chapter)
@@ -122,26 +137,27 @@ def generate_manifest(
     return manifest
 
 
+def manifest_is_fresh(manifest_path: Path, chapters_dir: Path) -> bool:
+    """Check if manifest_path exists and is newer than every chapter ZIP."""
+    try:
+        manifest_mtime = manifest_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+    newest_zip = max(
+        (p.stat().st_mtime_ns for p in chapters_dir.glob("*.zip")),
+        default=0
+    )
+    return manifest_mtime >= newest_zip
+
+
 def save_manifest(manifest: Manifest, output_path: Path) -> None:
     """Save manifest to JSON file."""
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Convert to dict with proper structure
-    data = {
-        "version": manifest.version,
-        "manga": asdict(manifest.manga),
-        "chapters": []
-    }
-
-    for ch in manifest.chapters:
-        ch_dict = {
-            "number": ch.number,
-            "title": ch.title,
-            "languages": {}
-        }
-        for lang, info in ch.languages.items():
-            ch_dict["languages"][lang] = asdict(info)
-        data["chapters"].append(ch_dict)
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # Dataclass fields map 1:1 onto the manifest JSON structure
+    if orjson is not None:
+        buf = orjson.dumps(manifest, option=orjson.OPT_INDENT_2)
+    else:
+        buf = json.dumps(asdict(manifest), indent=2, ensure_ascii=False).encode('utf-8')
+    output_path.write_bytes(buf)
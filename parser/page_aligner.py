@@ -16,19 +16,32 @@ Usage:
 """
 
 import argparse
+import atexit
+import hashlib
 import logging
+import os
 import zipfile
 import tempfile
 import shutil
 import json
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Optional
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, is_dataclass
+from typing import Iterator, Optional
 import io
 
 import imagehash
+import numpy as np
+import scipy.fftpack
 from PIL import Image
 
+from database import get_connection, transaction
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to stdlib json
+    orjson = None
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s"
@@ -40,13 +53,24 @@ logger = logging.getLogger(__name__)
 # For manga from different scanlation groups, use 20-25
 DEFAULT_THRESHOLD = 20
 
+# On-disk pHash cache keyed by image content, so re-aligning the same
+# chapter (e.g. while tuning the threshold) skips decoding and hashing
+PHASH_CACHE_PATH = Path(__file__).parent / ".phash_cache.sqlite"
+# Bump when compute_phash changes, so stale cached hashes are not reused
+PHASH_CACHE_VERSION = b"2"
+
+# Worker processes for pHash computation (created on first use, shared across chapters).
+# 1 hashes inline, e.g. when chapters themselves already run in worker processes.
+HASH_WORKERS = os.cpu_count()
+_HASH_POOL: Optional[ProcessPoolExecutor] = None
+
 
 @dataclass
 class PageInfo:
     """Information about a single page."""
     index: int
     filename: str
-    phash: str
+    phash: int  # 64-bit pHash; written as hex in JSON output
     width: int
     height: int
 
@@ -74,83 +98,287 @@ class AlignmentResult:
     avg_distance: float
 
 
-def compute_phash(image_data: bytes, hash_size: int = 8) -> tuple[imagehash.ImageHash, int, int]:
-    """Compute perceptual hash of an image.
+def alignment_default(o):
+    """Serialize alignment dataclasses for JSON (pHash as a hex string)."""
+    if isinstance(o, PageInfo):
+        data = dict(vars(o))
+        data["phash"] = f"{o.phash:016x}"
+        return data
+    if is_dataclass(o):
+        return vars(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
 
-    Returns (hash, width, height).
+
+class AlignmentEncoder(json.JSONEncoder):
+    """JSON encoder that serializes alignment dataclasses on demand.
+
+    Lets the C encoder walk lists/dicts and only calls back into Python for
+    PageMatch/PageInfo instances, instead of building a dict mirror first.
+    """
+
+    def default(self, o):
+        return alignment_default(o)
+
+
+def page_thumbnail(image_data: bytes, hash_size: int = 8) -> tuple[bytes, int, int]:
+    """Decode a page into the small grayscale square that pHash works on.
+
+    Returns (thumbnail pixels, width, height) with the page's original size.
     """
     img = Image.open(io.BytesIO(image_data))
     width, height = img.size
 
-    # Convert to grayscale (handles color vs B&W)
+    # Let the JPEG decoder downscale while decoding (no-op for other formats)
+    img.draft('L', (256, 256))
+
+    # Convert to grayscale (handles color vs B&W), then shrink to the
+    # (4 * hash_size)^2 grid imagehash.phash uses
     img = img.convert('L')
+    size = hash_size * 4
+    img = img.resize((size, size), Image.Resampling.LANCZOS)
+
+    return img.tobytes(), width, height
 
-    # Resize to standard size for consistent hashing across different resolutions
-    # This helps when comparing scans from different sources
-    img = img.resize((256, 256), Image.Resampling.LANCZOS)
 
-    # Compute perceptual hash
-    phash = imagehash.phash(img, hash_size=hash_size)
+def batch_phash(thumbnails: list[bytes], hash_size: int = 8) -> np.ndarray:
+    """Compute pHash bits for many thumbnails with one batched DCT.
 
-    return phash, width, height
+    Same result as imagehash.phash per image; returns a bool array of shape
+    (N, hash_size, hash_size).
+    """
+    size = hash_size * 4
+    pixels = np.frombuffer(b"".join(thumbnails), dtype=np.uint8)
+    pixels = pixels.reshape(len(thumbnails), size, size).astype(np.float64)
 
+    dct = scipy.fftpack.dct(scipy.fftpack.dct(pixels, axis=1), axis=2)
+    lowfreq = dct[:, :hash_size, :hash_size]
+    med = np.median(lowfreq.reshape(len(thumbnails), -1), axis=1)
+    return lowfreq > med[:, None, None]
 
-def extract_pages(zip_path: Path) -> list[tuple[str, bytes]]:
-    """Extract all image pages from a ZIP archive.
 
-    Returns list of (filename, image_data) tuples, sorted by filename.
+def phash_bits_to_int(bits: np.ndarray) -> int:
+    """Pack pHash bits (row-major, MSB first) into an int, like str(ImageHash)."""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def to_json_bytes(data) -> bytes:
+    """Encode data (may contain alignment dataclasses) as indented UTF-8 JSON.
+
+    Uses orjson if available; both paths write pHashes as hex strings.
     """
-    pages = []
-    image_extensions = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            default=alignment_default,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+    return json.dumps(data, indent=2, ensure_ascii=False, cls=AlignmentEncoder).encode('utf-8')
+
+
+def compute_phash(image_data: bytes, hash_size: int = 8) -> tuple[imagehash.ImageHash, int, int]:
+    """Compute perceptual hash of an image.
+
+    Returns (hash, width, height).
+    """
+    thumbnail, width, height = page_thumbnail(image_data, hash_size)
+    bits = batch_phash([thumbnail], hash_size)[0]
+    return imagehash.ImageHash(bits), width, height
+
+
+def get_hash_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared pHash process pool, creating it on first use.
+
+    Returns None when HASH_WORKERS <= 1 (hash in the calling process).
+    """
+    global _HASH_POOL
+    if HASH_WORKERS <= 1:
+        return None
+    if _HASH_POOL is None:
+        _HASH_POOL = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        atexit.register(_HASH_POOL.shutdown)
+    return _HASH_POOL
+
+
+def submit_thumbnail(pool: Optional[ProcessPoolExecutor], image_data: bytes) -> Future:
+    """Run page_thumbnail on the pool, or inline if there is no pool."""
+    if pool is not None:
+        return pool.submit(page_thumbnail, image_data)
+
+    future = Future()
+    try:
+        future.set_result(page_thumbnail(image_data))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def extract_pages(zip_path: Path) -> Iterator[tuple[str, bytes]]:
+    """Yield (filename, image_data) for each image page, sorted by filename.
+
+    Pages are read one at a time, so only the current page is held in memory.
+    """
+    image_extensions = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
 
     with zipfile.ZipFile(zip_path, 'r') as zf:
-        for name in sorted(zf.namelist()):
-            ext = Path(name).suffix.lower()
-            if ext in image_extensions:
-                data = zf.read(name)
-                pages.append((name, data))
+        for name in sorted(zf.NameToInfo):
+            if name.lower().endswith(image_extensions):
+                yield name, zf.read(name)
 
-    return pages
+
+def _phash_cache_conn():
+    """Get the pHash cache connection (creating the table if needed)."""
+    conn = get_connection(PHASH_CACHE_PATH)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS phash_cache (
+            digest BLOB PRIMARY KEY,
+            phash TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL
+        )
+    """)
+    return conn
 
 
 def analyze_chapter(zip_path: Path) -> list[PageInfo]:
     """Analyze all pages in a chapter ZIP."""
-    pages = extract_pages(zip_path)
+    conn = _phash_cache_conn()
     result = []
+    new_rows = []
 
-    for idx, (filename, data) in enumerate(pages):
+    # Stream pages: cached ones only need their digest; uncached ones are
+    # decoded to thumbnails in parallel (decode is the CPU-bound part).
+    # Byte-identical pages (repeated credits, etc.) are handled once.
+    pool = get_hash_pool()
+    pages = []
+    known = {}  # digest -> (phash, width, height)
+    pending = {}  # digest -> (filename, future)
+    for idx, (filename, data) in enumerate(extract_pages(zip_path)):
+        h = hashlib.sha1(PHASH_CACHE_VERSION + b":")
+        h.update(data)
+        digest = h.digest()[:16]
+        pages.append((idx, filename, digest))
+        if digest in known or digest in pending:
+            continue
+
+        row = conn.execute(
+            "SELECT phash, width, height FROM phash_cache WHERE digest = ?", (digest,)
+        ).fetchone()
+        if row:
+            known[digest] = (int(row[0], 16), row[1], row[2])
+        else:
+            pending[digest] = (filename, submit_thumbnail(pool, data))
+
+    # Collect thumbnails, then hash all of them with one batched DCT
+    thumbnails = {}
+    for digest, (filename, future) in pending.items():
         try:
-            phash, width, height = compute_phash(data)
-            result.append(PageInfo(
-                index=idx,
-                filename=filename,
-                phash=str(phash),
-                width=width,
-                height=height
-            ))
+            thumbnails[digest] = future.result()
         except Exception as e:
             logger.warning(f"Failed to process {filename}: {e}")
 
+    if thumbnails:
+        bits = batch_phash([thumb for thumb, _, _ in thumbnails.values()])
+        for (digest, (_, width, height)), page_bits in zip(thumbnails.items(), bits):
+            phash = phash_bits_to_int(page_bits)
+            known[digest] = (phash, width, height)
+            new_rows.append((digest, f"{phash:016x}", width, height))
+
+    for idx, filename, digest in pages:
+        if digest not in known:
+            continue  # page could not be decoded
+        phash, width, height = known[digest]
+        result.append(PageInfo(
+            index=idx,
+            filename=filename,
+            phash=phash,
+            width=width,
+            height=height
+        ))
+
+    # Save newly computed hashes in one transaction
+    if new_rows:
+        with transaction(PHASH_CACHE_PATH) as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO phash_cache (digest, phash, width, height)
+                VALUES (?, ?, ?, ?)
+            """, new_rows)
+
     return result
 
 
-def hash_distance(hash1: str, hash2: str) -> int:
-    """Compute Hamming distance between two hash strings."""
-    h1 = imagehash.hex_to_hash(hash1)
-    h2 = imagehash.hex_to_hash(hash2)
-    return h1 - h2
+def hash_distance(hash1: int, hash2: int) -> int:
+    """Compute Hamming distance between two pHashes."""
+    return (hash1 ^ hash2).bit_count()
 
 
 def build_distance_matrix(pages_a: list[PageInfo], pages_b: list[PageInfo]) -> list[list[int]]:
-    """Build a distance matrix between all pages."""
-    matrix = []
-    for pa in pages_a:
-        row = []
-        for pb in pages_b:
-            dist = hash_distance(pa.phash, pb.phash)
-            row.append(dist)
-        matrix.append(row)
-    return matrix
+    """Build a distance matrix between all pages (XOR + popcount per cell)."""
+    return hash_distance_matrix([pa.phash for pa in pages_a], [pb.phash for pb in pages_b])
+
+
+def hash_distance_matrix(hashes_a: list[int], hashes_b: list[int]) -> list[list[int]]:
+    """Build a distance matrix between two lists of pHashes."""
+    return [[(ha ^ hb).bit_count() for hb in hashes_b] for ha in hashes_a]
+
+
+# Needleman-Wunsch backpointer moves
+_DIAG, _UP, _LEFT = 0, 1, 2
+
+
+def _banded_nw(
+    hashes_a: list[int],
+    hashes_b: list[int],
+    threshold: int,
+    k: int
+) -> tuple[float, list]:
+    """Fill the alignment DP for cells with |i - j| <= k.
+
+    Returns (total cost, backpointers). Only two cost rows are kept:
+    prev[j] / curr[j] = minimum cost to align A[0:i-1] / A[0:i] with B[0:j].
+    bt[i][j] (one byte per cell) records the move that produced each cell,
+    preferring diagonal, then gap in B, then gap in A on ties.
+    """
+    n = len(hashes_a)
+    m = len(hashes_b)
+    INF = float('inf')
+
+    # Gap penalty - cost of inserting a page (unmatched)
+    GAP_PENALTY = threshold + 5
+    # Bad match - still allowed but with penalty
+    BAD_MATCH = GAP_PENALTY * 2
+
+    prev = [j * GAP_PENALTY if j <= k else INF for j in range(m + 1)]
+    bt = [bytes([_LEFT]) * (m + 1)]
+
+    for i in range(1, n + 1):
+        ha = hashes_a[i - 1]
+        curr = [INF] * (m + 1)
+        if i <= k:
+            curr[0] = i * GAP_PENALTY
+        bt_row = bytearray(m + 1)
+        bt_row[0] = _UP
+        for j in range(max(1, i - k), min(m, i + k) + 1):
+            # Option 1: Match A[i-1] with B[j-1]
+            dist = (ha ^ hashes_b[j - 1]).bit_count()
+            best = prev[j - 1] + (dist if dist <= threshold else BAD_MATCH)
+            move = _DIAG
+
+            # Option 2: Insert A[i-1] (gap in B)
+            up = prev[j] + GAP_PENALTY
+            if up < best:
+                best, move = up, _UP
+
+            # Option 3: Insert B[j-1] (gap in A)
+            left = curr[j - 1] + GAP_PENALTY
+            if left < best:
+                best, move = left, _LEFT
+
+            curr[j] = best
+            bt_row[j] = move
+        prev = curr
+        bt.append(bt_row)
+
+    return prev[m], bt
 
 
 def align_sequences(
@@ -175,79 +403,63 @@ def align_sequences(
     if m == 0:
         return [PageMatch(pa, None, None, "insert_a") for pa in pages_a]
 
-    # Build distance matrix
-    dist = build_distance_matrix(pages_a, pages_b)
+    # Distance math works on plain hash lists; PageInfo objects are only
+    # touched again when building PageMatch results
+    hashes_a = [pa.phash for pa in pages_a]
+    hashes_b = [pb.phash for pb in pages_b]
 
     # Gap penalty - cost of inserting a page (unmatched)
     GAP_PENALTY = threshold + 5
 
-    # DP table: dp[i][j] = minimum cost to align A[0:i] with B[0:j]
-    # INF placeholder
-    INF = float('inf')
-    dp = [[INF] * (m + 1) for _ in range(n + 1)]
-    dp[0][0] = 0
-
-    # Initialize: gaps at the beginning
-    for i in range(1, n + 1):
-        dp[i][0] = i * GAP_PENALTY
-    for j in range(1, m + 1):
-        dp[0][j] = j * GAP_PENALTY
-
-    # Fill DP table
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            # Option 1: Match A[i-1] with B[j-1]
-            match_cost = dist[i-1][j-1]
-            if match_cost <= threshold:
-                # Good match
-                dp[i][j] = min(dp[i][j], dp[i-1][j-1] + match_cost)
-            else:
-                # Bad match - still allow but with penalty
-                dp[i][j] = min(dp[i][j], dp[i-1][j-1] + GAP_PENALTY * 2)
-
-            # Option 2: Insert A[i-1] (gap in B)
-            dp[i][j] = min(dp[i][j], dp[i-1][j] + GAP_PENALTY)
-
-            # Option 3: Insert B[j-1] (gap in A)
-            dp[i][j] = min(dp[i][j], dp[i][j-1] + GAP_PENALTY)
+    # Fast path: same page count and the 1:1 alignment is provably optimal.
+    # Any other path needs at least two gaps, so a diagonal cheaper than
+    # 2 * GAP_PENALTY is the unique optimum of the full DP.
+    if n == m:
+        diag = [(ha ^ hb).bit_count() for ha, hb in zip(hashes_a, hashes_b)]
+        if max(diag) <= threshold and sum(diag) < 2 * GAP_PENALTY:
+            return [
+                PageMatch(pa, pb, d, "match" if d <= threshold // 2 else "weak_match")
+                for pa, pb, d in zip(pages_a, pages_b, diag)
+            ]
+
+    # Banded DP: start with a narrow band around the diagonal and widen it
+    # until the result provably matches the full DP. Any path leaving a band
+    # of width k needs at least 2k + 2 - |n - m| gaps, so a cheaper in-band
+    # optimum cannot be beaten outside the band.
+    size_diff = abs(n - m)
+    k = max(5, size_diff + 3)
+    while True:
+        cost, bt = _banded_nw(hashes_a, hashes_b, threshold, k)
+        if k >= max(n, m) or cost < (2 * k + 2 - size_diff) * GAP_PENALTY:
+            break
+        k *= 2
 
     # Traceback to find alignment
     matches = []
     i, j = n, m
 
     while i > 0 or j > 0:
-        if i > 0 and j > 0:
-            match_cost = dist[i-1][j-1]
-            came_from_match = (match_cost <= threshold and
-                               dp[i][j] == dp[i-1][j-1] + match_cost)
-            came_from_bad_match = (match_cost > threshold and
-                                   dp[i][j] == dp[i-1][j-1] + GAP_PENALTY * 2)
-
-            if came_from_match:
+        move = bt[i][j]
+        if move == _DIAG:
+            match_cost = (hashes_a[i-1] ^ hashes_b[j-1]).bit_count()
+            if match_cost <= threshold:
                 # Good match
                 match_type = "match" if match_cost <= threshold // 2 else "weak_match"
                 matches.append(PageMatch(pages_a[i-1], pages_b[j-1], match_cost, match_type))
-                i -= 1
-                j -= 1
-                continue
-            elif came_from_bad_match:
+            else:
                 # Bad match (mismatch) - treat as both insertions
                 matches.append(PageMatch(pages_a[i-1], None, None, "insert_a"))
                 matches.append(PageMatch(None, pages_b[j-1], None, "insert_b"))
-                i -= 1
-                j -= 1
-                continue
-
-        if i > 0 and dp[i][j] == dp[i-1][j] + GAP_PENALTY:
+            i -= 1
+            j -= 1
+        elif move == _UP:
             # Gap in B (A only)
             matches.append(PageMatch(pages_a[i-1], None, None, "insert_a"))
             i -= 1
-        elif j > 0:
+        else:
             # Gap in A (B only)
             matches.append(PageMatch(None, pages_b[j-1], None, "insert_b"))
             j -= 1
-        else:
-            break
 
     # Reverse since we traced back
     matches.reverse()
@@ -342,20 +554,11 @@ def save_alignment(result: AlignmentResult, output_path: Path):
         "insert_a_count": result.insert_a_count,
         "insert_b_count": result.insert_b_count,
         "avg_distance": result.avg_distance,
-        "matches": [
-            {
-                "page_a": asdict(m.page_a) if m.page_a else None,
-                "page_b": asdict(m.page_b) if m.page_b else None,
-                "distance": m.distance,
-                "match_type": m.match_type
-            }
-            for m in result.matches
-        ]
+        "matches": result.matches
     }
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    output_path.write_bytes(to_json_bytes(data))
 
     logger.info(f"Saved alignment to {output_path}")
 
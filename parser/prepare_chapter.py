@@ -21,8 +21,8 @@ Output structure:
 import argparse
 import logging
 import zipfile
-import json
 import re
+import shutil
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional
@@ -30,7 +30,7 @@ import io
 
 from PIL import Image
 
-from page_aligner import align_chapters, AlignmentResult, PageMatch
+from page_aligner import align_chapters, AlignmentResult, PageMatch, to_json_bytes
 
 logging.basicConfig(
     level=logging.INFO,
@@ -132,26 +132,25 @@ def create_aligned_zip(
 
     source_field = "en_source" if lang == "en" else "es_source"
 
-    # Read source images
-    source_images = {}
-    with zipfile.ZipFile(source_zip, 'r') as zf:
-        for name in zf.namelist():
-            if Path(name).suffix.lower() in {'.jpg', '.jpeg', '.png', '.webp'}:
-                source_images[name] = zf.read(name)
+    image_exts = ('.jpg', '.jpeg', '.png', '.webp')
 
     # Create output ZIP
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+    # Copy pages one at a time straight from the source ZIP
+    with zipfile.ZipFile(source_zip, 'r') as src, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_STORED) as zf:  # pages are already compressed
         for page in aligned_pages:
             source_name = getattr(page, source_field)
 
-            if source_name and source_name in source_images:
+            if (source_name and source_name in src.NameToInfo
+                    and source_name.lower().endswith(image_exts)):
                 # Get extension from source
                 ext = get_image_extension(source_name)
                 # New name with aligned index
                 new_name = f"{page.index:03d}{ext}"
-                zf.writestr(new_name, source_images[source_name])
+                with src.open(source_name) as r, zf.open(new_name, 'w') as w:
+                    shutil.copyfileobj(r, w)
 
     return output_path
 
@@ -221,8 +220,7 @@ def prepare_chapter(
     # Save alignment manifest
     manifest = create_alignment_manifest(aligned_pages, result, chapter_num)
     manifest_path = chapters_dir / f"{chapter_num}_alignment.json"
-    with open(manifest_path, 'w', encoding='utf-8') as f:
-        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    manifest_path.write_bytes(to_json_bytes(manifest))
     logger.info(f"Saved alignment manifest to {manifest_path.name}")
 
     return {
@@ -0,0 +1,49 @@
+"""Async token-bucket rate limiting, one bucket per host."""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Token bucket: allows bursts up to `capacity`, averages `fill_per_s` tokens/sec.
+
+    Tokens are refilled lazily on acquire, so no background task is needed.
+    """
+
+    def __init__(self, capacity: float, fill_per_s: float):
+        self.capacity = capacity
+        self.fill_per_s = fill_per_s
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_per_s)
+        self.updated = now
+
+    async def acquire(self, n: float = 1):
+        """Wait until `n` tokens are available and take them."""
+        # A request larger than the bucket could never be satisfied
+        n = min(n, self.capacity)
+
+        async with self._lock:
+            self._refill()
+            if self.tokens < n:
+                await asyncio.sleep((n - self.tokens) / self.fill_per_s)
+                self._refill()
+            self.tokens -= n
+
+
+# One bucket per MangaDex host (bursts of 5, 1 request/sec on average)
+BUCKETS = {
+    "api.mangadex.org": TokenBucket(capacity=5, fill_per_s=1.0),
+    "uploads.mangadex.org": TokenBucket(capacity=5, fill_per_s=1.0),
+}
+
+
+def get_bucket(host: str) -> TokenBucket:
+    """Get (or create) the token bucket for a host."""
+    if host not in BUCKETS:
+        BUCKETS[host] = TokenBucket(capacity=5, fill_per_s=1.0)
+    return BUCKETS[host]
@@ -3,6 +3,8 @@
 import random
 import asyncio
 import logging
+import time
+from functools import lru_cache
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -29,10 +31,9 @@ USER_AGENTS = [
 ]
 
 # Realistic browser headers
-def get_browser_headers(referer: Optional[str] = None) -> dict:
-    """Get realistic browser headers."""
-    ua = random.choice(USER_AGENTS)
-
+@lru_cache(maxsize=128)
+def _browser_headers(ua: str, referer: Optional[str]) -> dict:
+    """Build browser headers for a given User-Agent/referer (cached)."""
     headers = {
         "User-Agent": ua,
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
@@ -61,10 +62,16 @@ def get_browser_headers(referer: Optional[str] = None) -> dict:
     return headers
 
 
-def get_api_headers() -> dict:
-    """Get headers for API requests (JSON)."""
+def get_browser_headers(referer: Optional[str] = None) -> dict:
+    """Get realistic browser headers (random User-Agent per call)."""
     ua = random.choice(USER_AGENTS)
+    # Copy so callers can't mutate the cached template
+    return dict(_browser_headers(ua, referer))
+
 
+@lru_cache(maxsize=128)
+def _api_headers(ua: str) -> dict:
+    """Build API-request headers for a given User-Agent (cached)."""
     return {
         "User-Agent": ua,
         "Accept": "application/json",
@@ -78,10 +85,16 @@ def get_api_headers() -> dict:
     }
 
 
-def get_image_headers(referer: str) -> dict:
-    """Get headers for image downloads."""
+def get_api_headers() -> dict:
+    """Get headers for API requests (JSON, random User-Agent per call)."""
     ua = random.choice(USER_AGENTS)
+    # Copy so callers can't mutate the cached template
+    return dict(_api_headers(ua))
 
+
+@lru_cache(maxsize=128)
+def _image_headers(ua: str, referer: str) -> dict:
+    """Build image-request headers for a given User-Agent/referer (cached)."""
     return {
         "User-Agent": ua,
         "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
@@ -96,6 +109,13 @@ def get_image_headers(referer: str) -> dict:
     }
 
 
+def get_image_headers(referer: str) -> dict:
+    """Get headers for image downloads (random User-Agent per call)."""
+    ua = random.choice(USER_AGENTS)
+    # Copy so callers can't mutate the cached template
+    return dict(_image_headers(ua, referer))
+
+
 async def random_delay(min_sec: float = 0.5, max_sec: float = 2.0):
     """Wait for a random duration to simulate human behavior."""
     delay = random.uniform(min_sec, max_sec)
@@ -106,10 +126,11 @@ async def human_delay():
     """Simulate human-like delay between actions."""
     # Humans are not perfectly random - they have patterns
     # Most delays are short, occasional longer pauses
-    if random.random() < 0.1:
+    r = random.random()
+    if r < 0.1:
         # 10% chance of longer pause (distracted, reading, etc.)
         delay = random.uniform(3.0, 8.0)
-    elif random.random() < 0.3:
+    elif r < 0.4:
         # 30% chance of medium pause
         delay = random.uniform(1.5, 3.0)
     else:
@@ -160,7 +181,6 @@ class StealthRateLimiter:
     async def acquire(self):
         """Wait until it's safe to make a request."""
         async with self._lock:
-            import time
             now = time.monotonic()
 
             # Calculate required wait time
@@ -176,7 +196,15 @@ class StealthRateLimiter:
                 # Still add small random delay
                 await asyncio.sleep(random.uniform(0.1, 0.3))
 
-            self.last_request = time.monotonic()
+            # max() keeps a long_pause() scheduled while we were waiting
+            self.last_request = max(time.monotonic(), self.last_request)
+
+    def long_pause(self, seconds: float):
+        """Hold back the next request by `seconds` without blocking the caller.
+
+        Work that doesn't hit the network (zipping, DB writes) keeps running.
+        """
+        self.last_request = max(time.monotonic(), self.last_request) + seconds
 
     async def __aenter__(self):
         await self.acquire()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Regression tests for page_aligner.align_sequences.
+
+Usage:
+    python3 -m unittest test_page_aligner
+"""
+
+import random
+import unittest
+
+from page_aligner import PageInfo, PageMatch, align_sequences
+
+
+def full_dp_align(pages_a: list[PageInfo], pages_b: list[PageInfo], threshold: int) -> list[PageMatch]:
+    """Reference Needleman-Wunsch over the full matrix (no fast paths, no band)."""
+    n = len(pages_a)
+    m = len(pages_b)
+    GAP_PENALTY = threshold + 5
+    dist = [[(pa.phash ^ pb.phash).bit_count() for pb in pages_b] for pa in pages_a]
+
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        dp[i][0] = i * GAP_PENALTY
+    for j in range(1, m + 1):
+        dp[0][j] = j * GAP_PENALTY
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            d = dist[i-1][j-1]
+            dp[i][j] = min(
+                dp[i-1][j-1] + (d if d <= threshold else GAP_PENALTY * 2),
+                dp[i-1][j] + GAP_PENALTY,
+                dp[i][j-1] + GAP_PENALTY
+            )
+
+    matches = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0:
+            d = dist[i-1][j-1]
+            if d <= threshold and dp[i][j] == dp[i-1][j-1] + d:
+                match_type = "match" if d <= threshold // 2 else "weak_match"
+                matches.append(PageMatch(pages_a[i-1], pages_b[j-1], d, match_type))
+                i -= 1
+                j -= 1
+                continue
+            if d > threshold and dp[i][j] == dp[i-1][j-1] + GAP_PENALTY * 2:
+                matches.append(PageMatch(pages_a[i-1], None, None, "insert_a"))
+                matches.append(PageMatch(None, pages_b[j-1], None, "insert_b"))
+                i -= 1
+                j -= 1
+                continue
+        if i > 0 and dp[i][j] == dp[i-1][j] + GAP_PENALTY:
+            matches.append(PageMatch(pages_a[i-1], None, None, "insert_a"))
+            i -= 1
+        else:
+            matches.append(PageMatch(None, pages_b[j-1], None, "insert_b"))
+            j -= 1
+
+    matches.reverse()
+    return matches
+
+
+def make_pages(hashes: list[int]) -> list[PageInfo]:
+    return [PageInfo(i, f"{i:03d}.jpg", h, 100, 100) for i, h in enumerate(hashes)]
+
+
+def summarize(matches: list[PageMatch]) -> list[tuple]:
+    return [
+        (m.page_a and m.page_a.index, m.page_b and m.page_b.index, m.distance, m.match_type)
+        for m in matches
+    ]
+
+
+class AlignSequencesTest(unittest.TestCase):
+
+    def assert_same_as_full_dp(self, hashes_a: list[int], hashes_b: list[int], threshold: int):
+        pages_a = make_pages(hashes_a)
+        pages_b = make_pages(hashes_b)
+        self.assertEqual(
+            summarize(align_sequences(pages_a, pages_b, threshold)),
+            summarize(full_dp_align(pages_a, pages_b, threshold))
+        )
+
+    def test_one_page_shift_is_not_forced_onto_diagonal(self):
+        # Consecutive pages 18 bits apart: every diagonal pair is under the
+        # threshold, but shifting by one page is the cheaper alignment
+        h = [0]
+        for i in range(10):
+            h.append(h[-1] ^ (((1 << 18) - 1) << (i * 4 % 46)))
+        pages_a = make_pages(h[0:10])
+        pages_b = make_pages(h[1:11])
+
+        result = align_sequences(pages_a, pages_b, 20)
+
+        self.assertEqual(result[0].match_type, "insert_a")
+        self.assertEqual(result[-1].match_type, "insert_b")
+        self.assertEqual(summarize(result), summarize(full_dp_align(pages_a, pages_b, 20)))
+
+    def test_identical_chapters_match_one_to_one(self):
+        rng = random.Random(1)
+        hashes = [rng.getrandbits(64) for _ in range(20)]
+        result = align_sequences(make_pages(hashes), make_pages(hashes), 20)
+        self.assertEqual([m.match_type for m in result], ["match"] * 20)
+
+    def test_matches_full_dp_on_random_chapters(self):
+        rng = random.Random(4)
+        for _ in range(500):
+            n = rng.randint(0, 30)
+            m = max(0, n + rng.randint(-4, 4)) if rng.random() < 0.7 else rng.randint(0, 30)
+            base = [rng.getrandbits(64) for _ in range(max(n, m) + 4)]
+            offset = rng.randint(0, 2)
+
+            def noisy(h: int) -> int:
+                if rng.random() < 0.2:
+                    return h ^ rng.getrandbits(64)
+                return h ^ rng.getrandbits(rng.choice([2, 4, 8, 18]))
+
+            hashes_a = [noisy(base[i]) for i in range(n)]
+            hashes_b = [noisy(base[i + offset] if rng.random() < 0.8 else base[i]) for i in range(m)]
+            self.assert_same_as_full_dp(hashes_a, hashes_b, rng.choice([10, 20, 25]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,6 +23,13 @@ UPLOAD_DIR = Path(__file__).parent / "tmp" / "upload"
 SERVER_HOST = "smoreg.dev"
 SERVER_USER = "root"
 SERVER_DATA_PATH = "/opt/mangaoff/data"
+# Reuse one SSH connection for every ssh/scp/rsync call in a run
+# (and across back-to-back runs), instead of a new handshake each time
+SSH_OPTS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/mangaoff-%r@%h:%p",
+    "-o", "ControlPersist=60",
+]
 
 # Manga to upload (slug -> title)
 ALL_MANGA = {
@@ -85,12 +92,12 @@ def upload_manifest(manga_slug: str, title: str, dry_run: bool = False) -> bool:
     remote_dir = f"{SERVER_USER}@{SERVER_HOST}:{SERVER_DATA_PATH}/{manga_slug}/"
 
     # Create remote directory
-    mkdir_cmd = ["ssh", f"{SERVER_USER}@{SERVER_HOST}", f"mkdir -p {SERVER_DATA_PATH}/{manga_slug}"]
+    mkdir_cmd = ["ssh", *SSH_OPTS, f"{SERVER_USER}@{SERVER_HOST}", f"mkdir -p {SERVER_DATA_PATH}/{manga_slug}"]
     if not dry_run:
         subprocess.run(mkdir_cmd, check=True)
 
     # Upload manifest
-    scp_cmd = ["scp", str(manifest_path), remote_dir]
+    scp_cmd = ["scp", *SSH_OPTS, str(manifest_path), remote_dir]
     print(f"Uploading manifest: {' '.join(scp_cmd)}")
 
     if dry_run:
@@ -110,7 +117,7 @@ def upload_cover(manga_slug: str, dry_run: bool = False) -> bool:
 
     remote_dir = f"{SERVER_USER}@{SERVER_HOST}:{SERVER_DATA_PATH}/covers/{manga_slug}/"
 
-    rsync_cmd = ["rsync", "-avz", f"{cover_dir}/", remote_dir]
+    rsync_cmd = ["rsync", "-avz", "-e", " ".join(["ssh", *SSH_OPTS]), f"{cover_dir}/", remote_dir]
     print(f"Uploading cover: {' '.join(rsync_cmd)}")
 
     if dry_run:
@@ -17,17 +17,34 @@ Usage:
     # All available chapters
     python3 upload_chapter.py chainsaw-man --all
 
-    # Dry run (prepare only, don't upload)
+    # Dry run (prepare, then rsync --dry-run against the server)
     python3 upload_chapter.py chainsaw-man 001 --dry-run
+
+    # Prepare only, no network access at all
+    python3 upload_chapter.py chainsaw-man 001 --local-only
+
+    # Prepare chapters one at a time
+    python3 upload_chapter.py chainsaw-man --all --jobs 1
 """
 
 import argparse
 import logging
+import multiprocessing
+import os
+import queue
+import shlex
 import subprocess
 import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
+import page_aligner
 from prepare_chapter import prepare_chapter, DEFAULT_THRESHOLD
+from util import chapter_sort_key
 
 logging.basicConfig(
     level=logging.INFO,
@@ -39,21 +56,32 @@ logger = logging.getLogger(__name__)
 SERVER_HOST = "smoreg.dev"
 SERVER_USER = "root"
 SERVER_DATA_PATH = "/opt/mangaoff/data/chapters"  # nginx serves from here
+# Reuse one SSH connection for every ssh/scp/rsync call in a run
+# (and across back-to-back runs), instead of a new handshake each time
+SSH_OPTS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/mangaoff-%r@%h:%p",
+    "-o", "ControlPersist=60",
+]
+
+# Separator line for log/summary sections
+BANNER = "=" * 50
 
 # Local paths
 BACKUP_DIR = Path(__file__).parent.parent / "backup_downloads" / "chapters"
 UPLOAD_DIR = Path(__file__).parent / "tmp" / "upload"
 
 
+@lru_cache(maxsize=None)
+def normalize_chapter(chapter_num: str) -> str:
+    """Normalize chapter number (1 -> 001; '10.5' and other names unchanged)."""
+    return f"{int(chapter_num):03d}" if chapter_num.isdigit() else chapter_num
+
+
 def find_chapter_files(manga_slug: str, chapter_num: str) -> tuple[Path, Path]:
     """Find EN and ES ZIP files for a chapter."""
     manga_dir = BACKUP_DIR / manga_slug
-
-    # Normalize chapter number (001, 002, etc.)
-    if '.' in chapter_num:
-        ch_normalized = chapter_num
-    else:
-        ch_normalized = f"{int(chapter_num):03d}"
+    ch_normalized = normalize_chapter(chapter_num)
 
     en_zip = manga_dir / f"{ch_normalized}_en.zip"
     es_zip = manga_dir / f"{ch_normalized}_es.zip"
@@ -61,21 +89,25 @@ def find_chapter_files(manga_slug: str, chapter_num: str) -> tuple[Path, Path]:
     return en_zip, es_zip
 
 
-def find_all_chapters(manga_slug: str) -> list[str]:
-    """Find all available chapter numbers for a manga."""
+def list_zip_names(manga_slug: str) -> set[str]:
+    """Names of all ZIP files in a manga's backup dir (one directory pass)."""
     manga_dir = BACKUP_DIR / manga_slug
     if not manga_dir.exists():
-        return []
+        return set()
 
-    chapters = set()
-    for f in manga_dir.glob("*_en.zip"):
-        ch_num = f.stem.rsplit('_', 1)[0]
-        # Check if ES also exists
-        es_file = manga_dir / f"{ch_num}_es.zip"
-        if es_file.exists():
-            chapters.add(ch_num)
+    with os.scandir(manga_dir) as it:
+        return {entry.name for entry in it if entry.name.endswith(".zip")}
 
-    return sorted(chapters, key=lambda x: float(x) if x.replace('.', '').isdigit() else 0)
+
+def find_all_chapters(manga_slug: str) -> list[str]:
+    """Find all available chapter numbers for a manga."""
+    zip_names = list_zip_names(manga_slug)
+
+    # A chapter counts only if both EN and ES exist
+    en_chapters = {name[:-7] for name in zip_names if name.endswith("_en.zip")}
+    es_chapters = {name[:-7] for name in zip_names if name.endswith("_es.zip")}
+
+    return sorted(en_chapters & es_chapters, key=chapter_sort_key)
 
 
 def parse_range(range_str: str) -> list[str]:
@@ -84,33 +116,209 @@ def parse_range(range_str: str) -> list[str]:
     for part in range_str.split(','):
         if '-' in part:
             start, end = part.split('-', 1)
-            for i in range(int(start), int(end) + 1):
-                chapters.append(f"{i:03d}")
+            chapters.extend(f"{i:03d}" for i in range(int(start), int(end) + 1))
         else:
             chapters.append(f"{int(part):03d}")
     return chapters
 
 
-def rsync_upload(manga_slug: str, dry_run: bool = False) -> bool:
-    """Upload prepared files to server via rsync."""
-    # Local: tmp/upload/manga-slug/chapters/ -> Server: /opt/mangaoff/data/chapters/manga-slug/
+def _worker_context():
+    """Multiprocessing context for chapter workers.
+
+    forkserver imports prepare_chapter (numpy, scipy, PIL) once in the server
+    process; each worker is then forked from that warm, single-threaded
+    interpreter rather than from this one, which may be running the pipeline
+    uploader thread.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(["prepare_chapter"])
+    return ctx
+
+
+def _init_worker():
+    """Hash pages inline: chapter workers already use the cores."""
+    page_aligner.HASH_WORKERS = 1
+
+
+def _prepare_one(
+    manga_slug: str,
+    ch_num: str,
+    en_zip: Path,
+    es_zip: Path,
+    threshold: int,
+    keep_unpaired: bool
+) -> tuple[str, Optional[list[str]], str]:
+    """Prepare a single chapter. Returns (ch_num, output files or None, error)."""
+    try:
+        result = prepare_chapter(
+            manga_slug,
+            en_zip,
+            es_zip,
+            UPLOAD_DIR,
+            threshold,
+            keep_unpaired
+        )
+    except Exception as e:
+        return ch_num, None, f"Failed to prepare chapter {ch_num}: {e}"
+
+    return ch_num, [result["en_zip"], result["es_zip"], result["manifest"]], ""
+
+
+@lru_cache(maxsize=1)
+def rsync_opts() -> list[str]:
+    """Transfer options: whole-file copies, zstd compression when available."""
+    # -W skips the delta search: chapter ZIPs are rebuilt on every prepare,
+    # so there is little to reuse and the rolling checksums only cost CPU
+    opts = ["-a", "-W", "-z"]
+    try:
+        version = subprocess.run(["rsync", "--version"], capture_output=True, text=True).stdout
+    except OSError:
+        return opts
+    # rsync >= 3.2 lists its compressors; older versions only have zlib
+    if "zstd" in version:
+        opts.append("--compress-choice=zstd")
+    return opts
+
+
+def remote_dir_exists(remote_dir: str) -> Optional[bool]:
+    """Check whether a directory exists on the server.
+
+    Returns None if the check itself failed (ssh exits 255 on connection
+    or auth errors), so callers can tell that apart from a missing directory.
+    """
+    cmd = ["ssh", *SSH_OPTS, f"{SERVER_USER}@{SERVER_HOST}", f"test -d {shlex.quote(remote_dir)}"]
+    returncode = subprocess.run(cmd).returncode
+    if returncode == 0:
+        return True
+    if returncode == 1:
+        return False
+    logger.warning(f"Could not check {remote_dir} on server (ssh exit {returncode})")
+    return None
+
+
+def tar_upload(manga_slug: str, dry_run: bool = False) -> bool:
+    """Upload prepared files as one tar stream over ssh.
+
+    Faster than rsync for a first upload: no per-file remote checks.
+    """
     local_path = UPLOAD_DIR / manga_slug / "chapters"
-    remote_path = f"{SERVER_USER}@{SERVER_HOST}:{SERVER_DATA_PATH}/{manga_slug}/"
+    remote_dir = f"{SERVER_DATA_PATH}/{manga_slug}"
 
     if not local_path.exists():
         logger.error(f"Upload directory not found: {local_path}")
         return False
 
-    cmd = ["rsync", "-avz"]
+    tar_cmd = ["tar", "-cf", "-", "-C", str(local_path), "."]
+    ssh_cmd = [
+        "ssh", *SSH_OPTS, f"{SERVER_USER}@{SERVER_HOST}",
+        f"mkdir -p {shlex.quote(remote_dir)} && tar -xf - -C {shlex.quote(remote_dir)}"
+    ]
+
+    logger.info(f"Uploading to {remote_dir} (tar over ssh)...")
+    logger.info(f"Command: {' '.join(tar_cmd)} | {' '.join(ssh_cmd)}")
+
     if dry_run:
-        cmd.append("--dry-run")
-    cmd.extend([f"{local_path}/", remote_path])
+        logger.info("[DRY RUN] Skipping upload")
+        return True
+
+    tar = subprocess.Popen(tar_cmd, stdout=subprocess.PIPE)
+    ssh = subprocess.run(ssh_cmd, stdin=tar.stdout)
+    tar.stdout.close()
+    return tar.wait() == 0 and ssh.returncode == 0
+
+
+def rsync_upload(
+    manga_slug: str,
+    dry_run: bool = False,
+    streams: int = 1,
+    files: Optional[list[str]] = None
+) -> bool:
+    """Upload prepared files to server via rsync.
+
+    If files is given, only those are sent (via --files-from, so rsync skips
+    scanning the whole chapters dir). With streams > 1, chapters are split
+    across that many rsync processes running in parallel, each on its own
+    SSH connection.
+    """
+    # Local: tmp/upload/manga-slug/chapters/ -> Server: /opt/mangaoff/data/chapters/manga-slug/
+    local_path = UPLOAD_DIR / manga_slug / "chapters"
+    remote_path = f"{SERVER_USER}@{SERVER_HOST}:{SERVER_DATA_PATH}/{manga_slug}/"
 
-    logger.info(f"Uploading to {remote_path}...")
-    logger.info(f"Command: {' '.join(cmd)}")
+    if not local_path.exists():
+        logger.error(f"Upload directory not found: {local_path}")
+        return False
+
+    if streams <= 1:
+        cmd = ["rsync", *rsync_opts(), "-v", "-e", " ".join(["ssh", *SSH_OPTS])]
+        if dry_run:
+            cmd.append("--dry-run")
+
+        with tempfile.NamedTemporaryFile("wb", suffix=".files") as file_list:
+            if files is not None:
+                # NUL-delimited names relative to the chapters dir
+                file_list.write(b"".join(Path(f).name.encode() + b"\0" for f in files))
+                file_list.flush()
+                cmd.extend(["--from0", f"--files-from={file_list.name}"])
+            cmd.extend([f"{local_path}/", remote_path])
+
+            logger.info(f"Uploading to {remote_path}...")
+            logger.info(f"Command: {' '.join(cmd)}")
+
+            result = subprocess.run(cmd, capture_output=False)
+        return result.returncode == 0
+
+    # Split files into buckets, keeping each chapter's files together.
+    # No ControlMaster here: multiplexed sessions would share one TCP stream.
+    by_chapter = {}
+    paths = sorted(files) if files is not None else sorted(map(str, local_path.iterdir()))
+    for f in paths:
+        by_chapter.setdefault(Path(f).name.split('_', 1)[0], []).append(f)
+    if not by_chapter:
+        logger.info("Nothing to upload")
+        return True
+    buckets = [[] for _ in range(min(streams, len(by_chapter)))]
+    for i, files in enumerate(by_chapter.values()):
+        buckets[i % len(buckets)].extend(files)
+
+    cmds = []
+    for bucket in buckets:
+        cmd = ["rsync", *rsync_opts()]
+        if dry_run:
+            cmd.append("--dry-run")
+        cmds.append(cmd + bucket + [remote_path])
+
+    logger.info(f"Uploading to {remote_path} with {len(cmds)} parallel streams...")
+
+    with ThreadPoolExecutor(max_workers=len(cmds)) as ex:
+        returncodes = list(ex.map(lambda cmd: subprocess.run(cmd).returncode, cmds))
+
+    return all(rc == 0 for rc in returncodes)
+
+
+def _upload_worker(manga_slug: str, ready: queue.Queue, dry_run: bool, results: list):
+    """Upload prepared chapters as they arrive (None ends the queue).
+
+    Chapters that become ready while an upload runs go out together in the
+    next rsync call.
+    """
+    done = False
+    while not done:
+        files = ready.get()
+        if files is None:
+            break
+        while True:
+            try:
+                more = ready.get_nowait()
+            except queue.Empty:
+                break
+            if more is None:
+                done = True
+                break
+            files = files + more
 
-    result = subprocess.run(cmd, capture_output=False)
-    return result.returncode == 0
+        results.append(rsync_upload(manga_slug, dry_run=dry_run, files=files))
 
 
 def main():
@@ -131,6 +339,17 @@ def main():
                         help="Skip alignment, just upload existing files")
     parser.add_argument("--keep-unpaired", action="store_true",
                         help="Keep pages that exist only in one language (default: drop them)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Chapters to prepare in parallel (default: CPU count)")
+    parser.add_argument("--parallel-streams", type=int, default=1,
+                        help="Parallel rsync streams for the upload (default: 1)")
+    parser.add_argument("--first-upload", action="store_true",
+                        help="Upload with tar over ssh (default: auto when the manga is not on the server yet)")
+    parser.add_argument("--pipeline", action=argparse.BooleanOptionalAction, default=None,
+                        help="Upload each chapter as soon as it is prepared "
+                             "(default: on for single-stream rsync uploads)")
+    parser.add_argument("--local-only", action="store_true",
+                        help="Prepare files only; skip the upload (no ssh/rsync)")
 
     args = parser.parse_args()
 
@@ -144,7 +363,7 @@ def main():
     elif args.chapter_range:
         chapters = parse_range(args.chapter_range)
     elif args.chapters:
-        chapters = [f"{int(c):03d}" if c.isdigit() else c for c in args.chapters]
+        chapters = [normalize_chapter(c) for c in args.chapters]
     else:
         logger.error("Specify chapters, --range, or --all")
         return 1
@@ -153,61 +372,119 @@ def main():
     success_count = 0
     fail_count = 0
 
-    for ch_num in chapters:
-        logger.info(f"\n{'='*50}")
-        logger.info(f"Chapter {ch_num}")
-        logger.info(f"{'='*50}")
-
-        if not args.skip_prepare:
+    jobs_todo = []
+    if args.skip_prepare:
+        success_count = len(chapters)
+    else:
+        # Check which ZIPs exist with one directory scan up front
+        zip_names = list_zip_names(args.manga_slug)
+        for ch_num in chapters:
             en_zip, es_zip = find_chapter_files(args.manga_slug, ch_num)
 
-            if not en_zip.exists():
+            if en_zip.name not in zip_names:
                 logger.warning(f"EN file not found: {en_zip}")
                 fail_count += 1
-                continue
-
-            if not es_zip.exists():
+            elif es_zip.name not in zip_names:
                 logger.warning(f"ES file not found: {es_zip}")
                 fail_count += 1
-                continue
-
-            try:
-                prepare_chapter(
-                    args.manga_slug,
-                    en_zip,
-                    es_zip,
-                    UPLOAD_DIR,
-                    args.threshold,
-                    args.keep_unpaired
-                )
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Failed to prepare chapter {ch_num}: {e}")
-                fail_count += 1
-                continue
-        else:
-            success_count += 1
+            else:
+                jobs_todo.append((args.manga_slug, ch_num, en_zip, es_zip, args.threshold, args.keep_unpaired))
+
+    # Nothing to diff against on a first upload, so stream a tar instead
+    first_upload = args.first_upload
+    if not first_upload and not args.dry_run and not args.local_only and (jobs_todo or args.skip_prepare):
+        # If the check failed (None), stay on rsync: it diffs against whatever
+        # is on the server, where a tar would resend everything
+        first_upload = remote_dir_exists(f"{SERVER_DATA_PATH}/{args.manga_slug}") is False
+
+    # Pipeline: a background thread uploads chapters while later ones prepare
+    pipeline = args.pipeline
+    if pipeline is None:
+        pipeline = not first_upload and args.parallel_streams <= 1
+
+    upload_queue = None
+    upload_results = []
+    prepared_files = []
+    if pipeline and jobs_todo and not args.local_only:
+        upload_queue = queue.Queue()
+        uploader = threading.Thread(
+            target=_upload_worker,
+            args=(args.manga_slug, upload_queue, args.dry_run, upload_results)
+        )
+        uploader.start()
+
+    def record(ch_num: str, files: Optional[list[str]], err: str):
+        nonlocal success_count, fail_count
+        if files is None:
+            logger.error(err)
+            fail_count += 1
+            return
+        success_count += 1
+        prepared_files.extend(files)
+        if upload_queue is not None:
+            upload_queue.put(files)
+
+    if args.jobs <= 1 or len(jobs_todo) <= 1:
+        for job in jobs_todo:
+            logger.info(f"\n{BANNER}")
+            logger.info(f"Chapter {job[1]}")
+            logger.info(f"{BANNER}")
+
+            record(*_prepare_one(*job))
+    else:
+        # Chapters are independent, so prepare several at once
+        jobs = min(args.jobs, len(jobs_todo))
+        logger.info(f"Preparing {len(jobs_todo)} chapters with {jobs} workers")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=_worker_context(), initializer=_init_worker) as ex:
+            futures = [ex.submit(_prepare_one, *job) for job in jobs_todo]
+            for future in as_completed(futures):
+                ch_num, files, err = future.result()
+                if files is not None:
+                    logger.info(f"Chapter {ch_num} prepared")
+                record(ch_num, files, err)
+
+    if upload_queue is not None:
+        upload_queue.put(None)
+        uploader.join()
+        if upload_results and all(upload_results):
+            logger.info("Upload complete!")
+        elif upload_results:
+            logger.error("Upload failed!")
+            return 1
 
     # Upload
-    if success_count > 0:
-        logger.info(f"\n{'='*50}")
+    if args.local_only:
+        logger.info(f"Upload skipped (--local-only), files are in {UPLOAD_DIR / args.manga_slug}")
+    elif success_count > 0 and upload_queue is None:
+        logger.info(f"\n{BANNER}")
         logger.info("UPLOADING TO SERVER")
-        logger.info(f"{'='*50}")
+        logger.info(f"{BANNER}")
 
-        if rsync_upload(args.manga_slug, dry_run=args.dry_run):
+        if first_upload:
+            uploaded = tar_upload(args.manga_slug, dry_run=args.dry_run)
+        else:
+            # Send just this run's chapters; --skip-prepare syncs the whole dir
+            uploaded = rsync_upload(
+                args.manga_slug,
+                dry_run=args.dry_run,
+                streams=args.parallel_streams,
+                files=None if args.skip_prepare else prepared_files
+            )
+
+        if uploaded:
             logger.info("Upload complete!")
         else:
             logger.error("Upload failed!")
             return 1
 
     # Summary
-    print(f"\n{'='*50}")
+    print(f"\n{BANNER}")
     print("SUMMARY")
-    print(f"{'='*50}")
+    print(f"{BANNER}")
     print(f"Processed: {success_count}")
     print(f"Failed:    {fail_count}")
     print(f"Dry run:   {args.dry_run}")
-    print(f"{'='*50}")
+    print(f"{BANNER}")
 
     return 0 if fail_count == 0 else 1
 
@@ -0,0 +1,47 @@
+"""Small helpers shared by the download scripts."""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# Characters rewritten when building a slug (one pass via str.translate)
+_SLUG_TRANS = str.maketrans({" ": "-", ":": "", "!": ""})
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+
+def make_slug(title: str) -> str:
+    """Create URL-friendly slug from title."""
+    return title.lower().translate(_SLUG_TRANS)
+
+
+def chapter_sort_key(chapter_number: str) -> float:
+    """Numeric sort key for a chapter number (non-numeric sorts first)."""
+    try:
+        return float(chapter_number)
+    except ValueError:
+        return 0.0
+
+
+def setup_logging(log_file: str, level: int = logging.INFO):
+    """Log to console and log_file from a background thread.
+
+    Records go through a queue, so console/file writes never block the
+    event loop. The listener is stopped (and the queue drained) at exit.
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    stream_handler = logging.StreamHandler()
+    file_handler = logging.FileHandler(log_file, delay=True)
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, stream_handler, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # Formatting happens in the listener's handlers
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=level, handlers=[queue_handler])